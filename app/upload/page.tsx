@@ -7,6 +7,10 @@ import { Card } from "@/components/ui/card"
 import { Alert, AlertDescription } from "@/components/ui/alert"
 import { DatasetUploadForm } from "@/components/dataset-upload-form"
 import { BatchPredictionResults } from "@/components/batch-prediction-results"
+import { StoredBatchResults } from "@/components/stored-batch-results"
+
+// When set, uploads are scored and stored by the Flask backend and paged from there
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL
 
 interface PredictionResult {
   row_number: number
@@ -21,12 +25,15 @@ export default function UploadPage() {
   const [progress, setProgress] = useState(0)
   const [processingTime, setProcessingTime] = useState<number>(0)
   const [datasetSize, setDatasetSize] = useState<string>("")
+  const [runId, setRunId] = useState<string | null>(null)
+  const [resultCount, setResultCount] = useState(0)
 
   const handleUpload = async (file: File) => {
     const startTime = Date.now()
     setLoading(true)
     setError(null)
     setResults([])
+    setRunId(null)
     setFileName(file.name)
     setProgress(0)
     const fileSizeMB = (file.size / (1024 * 1024)).toFixed(2)
@@ -36,7 +43,7 @@ export default function UploadPage() {
       const formData = new FormData()
       formData.append("file", file)
 
-      const response = await fetch("/api/batch-predict", {
+      const response = await fetch(BACKEND_URL ? `${BACKEND_URL}/api/batch-predict` : "/api/batch-predict", {
         method: "POST",
         body: formData,
       })
@@ -47,7 +54,13 @@ export default function UploadPage() {
       }
 
       const data = await response.json()
-      setResults(data.predictions || [])
+      if (data.run_id) {
+        setRunId(data.run_id)
+        setResultCount(data.count)
+      } else {
+        setResults(data.predictions || [])
+        setResultCount((data.predictions || []).length)
+      }
       setProgress(100)
       const endTime = Date.now()
       setProcessingTime((endTime - startTime) / 1000)
@@ -59,6 +72,10 @@ export default function UploadPage() {
   }
 
   const downloadResults = () => {
+    if (runId) {
+      window.location.href = `${BACKEND_URL}/api/results/${runId}/export`
+      return
+    }
     if (results.length === 0) return
 
     const allKeys = new Set<string>()
@@ -149,14 +166,14 @@ export default function UploadPage() {
               </Alert>
             )}
 
-            {results.length > 0 && (
+            {(results.length > 0 || runId) && (
               <div className="space-y-4">
                 <Card className="p-6 border border-border">
                   <div className="flex items-center justify-between mb-4">
                     <div>
                       <h2 className="text-xl font-semibold text-foreground">Predictions</h2>
                       <p className="text-sm text-muted-foreground mt-1">
-                        {results.length} patients analyzed from {fileName} ({datasetSize})
+                        {resultCount.toLocaleString()} patients analyzed from {fileName} ({datasetSize})
                         {processingTime > 0 && ` - Processed in ${processingTime.toFixed(1)}s`}
                       </p>
                     </div>
@@ -164,12 +181,16 @@ export default function UploadPage() {
                       Download CSV
                     </Button>
                   </div>
-                  <BatchPredictionResults results={results} />
+                  {runId && BACKEND_URL ? (
+                    <StoredBatchResults backendUrl={BACKEND_URL} runId={runId} />
+                  ) : (
+                    <BatchPredictionResults results={results} />
+                  )}
                 </Card>
               </div>
             )}
 
-            {!results.length && !loading && !error && (
+            {!results.length && !runId && !loading && !error && (
               <Card className="p-12 border border-dashed border-border bg-card/50 text-center">
                 <div className="text-5xl mb-4">📤</div>
                 <h3 className="text-lg font-semibold text-foreground mb-2">Ready to upload</h3>
@@ -1,156 +1,66 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import joblib
+import csv
+import io
+import json
 import os
-import numpy as np
 import pandas as pd
-from pathlib import Path
 from io import StringIO
+import time
 import traceback
 
+from profiling import profiled, register_profile_routes
+from validation import merge_quality, summarize_quality
+from explanations import MAX_EXPLAINED_ROWS
+from inference import (
+    MODEL_DIR, COLUMN_MAPPING, lgbm_model, model_variants,
+    TopRiskRecords, map_columns, make_prediction, predict_chunk, explain_records,
+)
+from result_store import ResultStore, find_patient_id_column
+
 app = Flask(__name__)
 CORS(app)
+register_profile_routes(app)
+
+result_store = ResultStore()
+
+# Rows returned with a batch response and the largest page a client may request
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
 
-# Load models and preprocessing objects
-MODEL_DIR = Path(__file__).parent / "models"
-
-# Try to load the trained models
-lgbm_model = None
-scaler = None
-imputer = None
-feature_names = None
-
-try:
-    lgbm_model = joblib.load(MODEL_DIR / "lightgbm_model.pkl")
-    scaler = joblib.load(MODEL_DIR / "scaler.pkl")
-    imputer = joblib.load(MODEL_DIR / "imputer.pkl")
-    feature_names = joblib.load(MODEL_DIR / "feature_names.pkl")
-    print("✓ Trained LightGBM model loaded successfully")
-except FileNotFoundError:
-    print("⚠ Warning: Trained models not found. Using mock predictions.")
-    print("  Please run: python scripts/train_real_model.py")
-
-COLUMN_MAPPING = {
-    "hour": "hour",
-    "hr": "HR",
-    "heart_rate": "HR",
-    "o2sat": "O2Sat",
-    "oxygen_saturation": "O2Sat",
-    "temp": "Temp",
-    "temperature": "Temp",
-    "sbp": "SBP",
-    "systolic_bp": "SBP",
-    "systolic_blood_pressure": "SBP",
-    "map": "MAP",
-    "mean_arterial_pressure": "MAP",
-    "dbp": "DBP",
-    "diastolic_bp": "DBP",
-    "diastolic_blood_pressure": "DBP",
-    "resp": "Resp",
-    "respiratory_rate": "Resp",
-    "etco2": "EtCO2",
-    "baseexcess": "BaseExcess",
-    "hco3": "HCO3",
-    "fio2": "FiO2",
-    "ph": "pH",
-    "paco2": "PaCO2",
-    "sao2": "SaO2",
-    "ast": "AST",
-    "bun": "BUN",
-    "alkalinephos": "Alkalinephos",
-    "calcium": "Calcium",
-    "chloride": "Chloride",
-    "creatinine": "Creatinine",
+# Default variant per endpoint, overridable per request with ?variant= or X-Model-Variant
+ENDPOINT_VARIANTS = {
+    "predict": os.environ.get("SEPSIS_PREDICT_VARIANT", "full"),
+    "batch": os.environ.get("SEPSIS_BATCH_VARIANT", "full"),
 }
+for endpoint, variant in ENDPOINT_VARIANTS.items():
+    if variant != "full" and variant not in model_variants:
+        print(f"⚠ Warning: variant '{variant}' for {endpoint} not available, using full model")
+        ENDPOINT_VARIANTS[endpoint] = "full"
 
-def map_columns(df):
-    """Map dataset columns to actual feature names"""
-    # Normalize column names
-    df_normalized = pd.DataFrame()
-    
-    for col in df.columns:
-        col_lower = col.lower().strip()
-        
-        # Find matching column name
-        mapped_col = None
-        for key, value in COLUMN_MAPPING.items():
-            if key == col_lower or col_lower == value.lower():
-                mapped_col = value
-                break
-        
-        if mapped_col:
-            df_normalized[mapped_col] = df[col]
-    
-    return df_normalized
+def resolve_variant(endpoint):
+    """Model variant for this request; raises ValueError for unknown names"""
+    variant = request.args.get("variant") or request.headers.get("X-Model-Variant") or ENDPOINT_VARIANTS[endpoint]
+    if variant != "full" and variant not in model_variants:
+        available = ", ".join(["full"] + sorted(model_variants))
+        raise ValueError(f"Unknown model variant '{variant}' (available: {available})")
+    return variant
 
-def make_prediction(row_features):
-    """Make predictions using the trained LightGBM model"""
+def resolve_explain_limit():
+    """Batch explanation cap for this request; raises ValueError for bad values"""
+    value = request.args.get("explain_limit")
+    if value is None:
+        return MAX_EXPLAINED_ROWS
     try:
-        if lgbm_model is None or feature_names is None:
-            # Fallback mock prediction
-            return make_mock_prediction(row_features)
-        
-        # Prepare feature array
-        X_row = []
-        for feature in feature_names:
-            value = row_features.get(feature, None)
-            if pd.isna(value) or value is None:
-                value = 0  # Will be imputed
-            X_row.append(float(value))
-        
-        X_row = np.array(X_row).reshape(1, -1)
-        
-        # Apply imputation
-        if imputer:
-            X_row = imputer.transform(X_row)
-        
-        # Apply scaling
-        if scaler:
-            X_row = scaler.transform(X_row)
-        
-        # Make prediction
-        pred = lgbm_model.predict(X_row)[0]
-        pred_proba = lgbm_model.predict_proba(X_row)[0]
-        
-        confidence = max(pred_proba) * 100
-        result = "Sepsis Detected" if pred == 1 else "No Sepsis"
-        
-        return {
-            "prediction": result,
-            "confidence": round(confidence, 2),
-            "probability_no_sepsis": round(pred_proba[0] * 100, 2),
-            "probability_sepsis": round(pred_proba[1] * 100, 2)
-        }
-    except Exception as e:
-        print(f"Prediction error: {str(e)}")
-        traceback.print_exc()
-        return make_mock_prediction(row_features)
-
-def make_mock_prediction(features):
-    """Fallback mock prediction based on SIRS criteria"""
-    temp = features.get("Temp", 37.0) or 37.0
-    hr = features.get("HR", 70.0) or 70.0
-    rr = features.get("Resp", 16.0) or 16.0
-    
-    sirs_score = 0
-    if temp > 38.0 or temp < 36.0:
-        sirs_score += 1
-    if hr > 100:
-        sirs_score += 1
-    if rr > 20:
-        sirs_score += 1
-    
-    prediction = "Sepsis Detected" if sirs_score >= 2 else "No Sepsis"
-    confidence = (sirs_score / 3) * 100 if sirs_score > 0 else 0
-    
-    return {
-        "prediction": prediction,
-        "confidence": round(confidence, 2),
-        "probability_no_sepsis": round((1 - sirs_score/3) * 100, 2),
-        "probability_sepsis": round((sirs_score / 3) * 100, 2)
-    }
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f"explain_limit must be an integer, got '{value}'")
+    if limit < 0:
+        raise ValueError("explain_limit must not be negative")
+    return min(limit, MAX_EXPLAINED_ROWS)
 
 @app.route("/api/predict", methods=["POST"])
+@profiled
 def predict():
     """Endpoint for sepsis prediction"""
     try:
@@ -162,22 +72,32 @@ def predict():
             if col in COLUMN_MAPPING:
                 features[COLUMN_MAPPING[col]] = data[col]
         
-        # Make prediction
-        result = make_prediction(features)
+        try:
+            variant = resolve_variant("predict")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Make prediction, explained unless the caller opts out with ?explain=0
+        explain = request.args.get("explain", "1") != "0"
+        result = make_prediction(features, explain=explain, variant=variant)
         
         return jsonify({
             "RandomForest": result["prediction"],
             "FinalPrediction": result["prediction"],
             "confidence": result["confidence"],
-            "probability": result["probability_sepsis"]
+            "probability": result["probability_sepsis"],
+            "explanation": result.get("explanation"),
+            "model_variant": variant
         }), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/batch-predict", methods=["POST"])
+@profiled
 def batch_predict():
     """Endpoint for batch predictions from CSV file - optimized for large datasets"""
+    run_id = None
     try:
         if "file" not in request.files:
             return jsonify({"error": "No file provided"}), 400
@@ -190,11 +110,30 @@ def batch_predict():
         if not file.filename.endswith(".csv"):
             return jsonify({"error": "File must be a CSV"}), 400
 
+        try:
+            variant = resolve_variant("batch")
+            explain_budget = resolve_explain_limit()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         # Read CSV file in chunks for large files
-        print(f"Processing file: {file.filename}")
+        print(f"Processing file: {file.filename} (model variant: {variant})")
+        
+        # Results are persisted per run; only the first page is sent back unless ?inline=1
+        run_id = result_store.create_run(file.filename)
+        inline = request.args.get("inline") == "1"
         predictions = []
+        row_count = 0
+        quality_totals = {}
         chunk_size = 5000  # Process 5000 rows at a time
         
+        # Per-row explanations are opt-in for batches. They are computed after
+        # scoring, for the highest-risk flagged rows of the whole file only
+        explain = (request.form.get("explain") or request.args.get("explain") or "0") == "1"
+        explain_candidates = TopRiskRecords(explain_budget) if explain else None
+        mapped_columns = []
+        scoring_time = 0.0
+        
         try:
             # Read CSV in chunks to handle large files
             for chunk_idx, chunk_df in enumerate(pd.read_csv(file.stream, chunksize=chunk_size)):
@@ -205,56 +144,215 @@ def batch_predict():
                 if mapped_df.empty:
                     continue
                 
-                # Process each row in chunk
-                for idx, row in mapped_df.iterrows():
-                    try:
-                        row_dict = row.to_dict()
-                        pred_result = make_prediction(row_dict)
-                        
-                        result = {
-                            "row": len(predictions),
-                            **{k: v for k, v in row_dict.items() if v is not None},
-                            "Prediction": pred_result["prediction"],
-                            "Confidence": pred_result["confidence"],
-                            "Probability_Sepsis": pred_result["probability_sepsis"],
-                            "Probability_No_Sepsis": pred_result["probability_no_sepsis"]
-                        }
-                        predictions.append(result)
-                    except Exception as e:
-                        print(f"Error processing row {idx}: {str(e)}")
-                        continue
+                # Validate and score the whole chunk at once
+                start = time.perf_counter()
+                chunk_predictions, chunk_quality, _ = predict_chunk(mapped_df, row_offset=row_count, variant=variant)
+                scoring_time += time.perf_counter() - start
+                merge_quality(quality_totals, chunk_quality)
+                mapped_columns = list(mapped_df.columns)
+                
+                patient_column = find_patient_id_column(chunk_df.columns)
+                patient_ids = None
+                if patient_column is not None:
+                    patient_ids = chunk_df[patient_column].astype(str).where(chunk_df[patient_column].notna(), None).tolist()
+                    for record, patient_id in zip(chunk_predictions, patient_ids):
+                        record["patient_id"] = patient_id
+                if explain_candidates is not None:
+                    for record in chunk_predictions:
+                        record["Explanation"] = None
+                    explain_candidates.add(chunk_predictions)
+                result_store.add_rows(run_id, chunk_predictions, patient_ids)
+                
+                row_count += len(chunk_predictions)
+                if inline:
+                    predictions.extend(chunk_predictions)
+                elif len(predictions) < DEFAULT_PAGE_SIZE:
+                    predictions.extend(chunk_predictions[:DEFAULT_PAGE_SIZE - len(predictions)])
         
         except Exception as e:
+            result_store.finish_run(run_id, status="failed")
             return jsonify({"error": f"Failed to read CSV: {str(e)}"}), 400
 
-        if not predictions:
+        if not row_count:
+            result_store.finish_run(run_id, status="failed")
             return jsonify({"error": "No valid rows in CSV"}), 400
 
-        print(f"Total predictions generated: {len(predictions)}")
-        return jsonify({"predictions": predictions, "count": len(predictions)}), 200
+        explain_totals = None
+        if explain_candidates is not None:
+            # Second pass over the highest-risk rows; the first page shares these dicts
+            start = time.perf_counter()
+            records = explain_candidates.records()
+            explanations, explain_totals = explain_records(records, mapped_columns, variant=variant)
+            for record, row_explanation in zip(records, explanations):
+                record["Explanation"] = row_explanation
+            result_store.update_rows(run_id, records)
+            explain_totals["time_s"] = time.perf_counter() - start
+
+        quality = summarize_quality(quality_totals)
+        summary = result_store.finish_run(run_id, quality=quality)
+        print(f"Total predictions generated: {row_count} (run {run_id})")
+        response = {
+            "run_id": run_id,
+            "predictions": predictions,
+            "count": row_count,
+            "page_size": len(predictions) if inline else DEFAULT_PAGE_SIZE,
+            "summary": summary,
+            "quality": quality,
+            "model_variant": variant
+        }
+        if explain_totals is not None:
+            explain_totals["time_s"] = round(explain_totals["time_s"], 4)
+            explain_totals["overhead_fraction"] = round(explain_totals["time_s"] / max(scoring_time, 1e-9), 4)
+            explain_totals["explain_limit"] = explain_budget
+            response["explanation_stats"] = explain_totals
+            print(f"Explanations took {explain_totals['time_s']:.3f}s of {scoring_time:.3f}s scoring")
+        return jsonify(response), 200
 
     except Exception as e:
         print(f"Batch prediction error: {str(e)}")
         traceback.print_exc()
+        # Don't leave the run looking like it is still being scored
+        run = result_store.get_run(run_id) if run_id is not None else None
+        if run is not None and run["status"] == "running":
+            result_store.finish_run(run_id, status="failed")
         return jsonify({"error": str(e)}), 500
 
+def result_filters():
+    """Filters for stored results from the query string"""
+    def number(name):
+        value = request.args.get(name)
+        return float(value) if value not in (None, "") else None
+
+    return {
+        "prediction": request.args.get("prediction") or None,
+        "min_confidence": number("min_confidence"),
+        "max_confidence": number("max_confidence"),
+        "patient_id": request.args.get("patient_id") or None,
+    }
+
+@app.route("/api/results/<run_id>", methods=["GET"])
+def get_results(run_id):
+    """Paginated, filtered and sorted rows of a stored batch run"""
+    try:
+        if result_store.get_run(run_id) is None:
+            return jsonify({"error": "Run not found"}), 404
+        
+        page = max(int(request.args.get("page", 1)), 1)
+        page_size = min(max(int(request.args.get("page_size", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        rows, total = result_store.query(
+            run_id,
+            page=page,
+            page_size=page_size,
+            sort=request.args.get("sort", "row"),
+            order=request.args.get("order", "asc"),
+            **result_filters()
+        )
+        return jsonify({
+            "run_id": run_id,
+            "predictions": rows,
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "total_pages": (total + page_size - 1) // page_size
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route("/api/results/<run_id>/summary", methods=["GET"])
+def get_results_summary(run_id):
+    """Aggregates for a stored run, optionally over a filtered subset"""
+    try:
+        run = result_store.get_run(run_id)
+        if run is None:
+            return jsonify({"error": "Run not found"}), 404
+        
+        filters = result_filters()
+        if any(value is not None for value in filters.values()):
+            summary = result_store.summary(run_id, **filters)
+        else:
+            summary = run["summary"]  # Precomputed when the run finished
+        return jsonify({**run, "summary": summary}), 200
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route("/api/results/<run_id>/export", methods=["GET"])
+def export_results(run_id):
+    """Stream every row of a stored run as CSV"""
+    if result_store.get_run(run_id) is None:
+        return jsonify({"error": "Run not found"}), 404
+    
+    def generate():
+        writer = None
+        buffer = io.StringIO()
+        for record in result_store.iter_rows(run_id):
+            record = {k: v for k, v in record.items() if k != "Explanation"}
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(record), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerow(record)
+            if buffer.tell() > 1 << 16:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    headers = {"Content-Disposition": f"attachment; filename=sepsis-predictions-{run_id}.csv"}
+    return Response(generate(), mimetype="text/csv", headers=headers)
+
+METRICS_PATH = MODEL_DIR / "metrics.json"
+
+# Fallback until scripts/evaluate_model.py has written metrics.json
+DEFAULT_METRICS = {
+    "LightGBM": {
+        "accuracy": 0.98,
+        "precision": 0.64,
+        "recall": 0.01,
+        "f1": 0.01,
+    }
+}
+
+_metrics_cache = {"mtime": None, "metrics": None}
+
+def load_metrics():
+    """Return evaluation metrics, rereading metrics.json only when it changes"""
+    try:
+        mtime = METRICS_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    if _metrics_cache["mtime"] != mtime:
+        try:
+            with open(METRICS_PATH) as f:
+                _metrics_cache["metrics"] = json.load(f)
+            _metrics_cache["mtime"] = mtime
+        except (OSError, ValueError) as e:
+            print(f"Failed to load metrics: {str(e)}")
+    return _metrics_cache["metrics"]
+
 @app.route("/api/metrics", methods=["GET"])
 def get_metrics():
     """Endpoint for model metrics"""
-    return jsonify({
-        "LightGBM": {
-            "accuracy": 0.98,
-            "precision": 0.64,
-            "recall": 0.01,
-            "f1": 0.01,
-        }
-    }), 200
+    metrics = load_metrics()
+    if metrics is None:
+        return jsonify(DEFAULT_METRICS), 200
+
+    # The full fold and threshold breakdown is only sent on request
+    if request.args.get("details") == "1":
+        return jsonify(metrics), 200
+    return jsonify({k: v for k, v in metrics.items() if k != "evaluation"}), 200
 
 @app.route("/api/health", methods=["GET"])
 def health():
     """Health check endpoint"""
     model_status = "loaded" if lgbm_model is not None else "not_loaded"
-    return jsonify({"status": "ok", "model_status": model_status}), 200
+    return jsonify({
+        "status": "ok",
+        "model_status": model_status,
+        "model_variants": ["full"] + sorted(model_variants) if lgbm_model is not None else [],
+        "endpoint_variants": ENDPOINT_VARIANTS
+    }), 200
 
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
@@ -0,0 +1,279 @@
+"""
+Model loading, column mapping and vectorized scoring shared by the Flask app
+and the offline bulk scorer (score_csv.py).
+"""
+
+import heapq
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import traceback
+
+from validation import validate_frame
+from explanations import explain_matrix
+
+# Load models and preprocessing objects
+MODEL_DIR = Path(__file__).parent / "models"
+
+# Try to load the trained models
+lgbm_model = None
+scaler = None
+imputer = None
+feature_names = None
+
+try:
+    lgbm_model = joblib.load(MODEL_DIR / "lightgbm_model.pkl")
+    scaler = joblib.load(MODEL_DIR / "scaler.pkl")
+    imputer = joblib.load(MODEL_DIR / "imputer.pkl")
+    feature_names = joblib.load(MODEL_DIR / "feature_names.pkl")
+    print("✓ Trained LightGBM model loaded successfully")
+except FileNotFoundError:
+    print("⚠ Warning: Trained models not found. Using mock predictions.")
+    print("  Please run: python scripts/train_real_model.py")
+
+# Reduced serving variants (fewer trees / float32) built by train_real_model.py.
+# "full" always means lightgbm_model.pkl itself.
+model_variants = {}
+if lgbm_model is not None:
+    try:
+        model_variants = joblib.load(MODEL_DIR / "model_variants.pkl")
+        print(f"✓ Model variants loaded: {', '.join(sorted(model_variants))}")
+    except FileNotFoundError:
+        pass
+
+COLUMN_MAPPING = {
+    "hour": "hour",
+    "hr": "HR",
+    "heart_rate": "HR",
+    "o2sat": "O2Sat",
+    "oxygen_saturation": "O2Sat",
+    "temp": "Temp",
+    "temperature": "Temp",
+    "sbp": "SBP",
+    "systolic_bp": "SBP",
+    "systolic_blood_pressure": "SBP",
+    "map": "MAP",
+    "mean_arterial_pressure": "MAP",
+    "dbp": "DBP",
+    "diastolic_bp": "DBP",
+    "diastolic_blood_pressure": "DBP",
+    "resp": "Resp",
+    "respiratory_rate": "Resp",
+    "etco2": "EtCO2",
+    "baseexcess": "BaseExcess",
+    "hco3": "HCO3",
+    "fio2": "FiO2",
+    "ph": "pH",
+    "paco2": "PaCO2",
+    "sao2": "SaO2",
+    "ast": "AST",
+    "bun": "BUN",
+    "alkalinephos": "Alkalinephos",
+    "calcium": "Calcium",
+    "chloride": "Chloride",
+    "creatinine": "Creatinine",
+}
+
+def map_columns(df):
+    """Map dataset columns to actual feature names"""
+    # Normalize column names
+    df_normalized = pd.DataFrame()
+    
+    for col in df.columns:
+        col_lower = col.lower().strip()
+        
+        # Find matching column name
+        mapped_col = None
+        for key, value in COLUMN_MAPPING.items():
+            if key == col_lower or col_lower == value.lower():
+                mapped_col = value
+                break
+        
+        if mapped_col:
+            df_normalized[mapped_col] = df[col]
+    
+    return df_normalized
+
+MODEL_COLUMNS = list(dict.fromkeys(COLUMN_MAPPING.values()))
+
+def score_columns(mapped_columns=()):
+    """Columns to validate for a chunk: model features plus any mapped extras"""
+    base = feature_names if feature_names is not None else MODEL_COLUMNS
+    return list(dict.fromkeys(list(base) + list(mapped_columns)))
+
+def predict_matrix(X, columns, explain=False, variant="full"):
+    """Score a validated feature matrix in one call.
+
+    Returns (predicted labels, P(no sepsis), P(sepsis), explanation) where the
+    first three are arrays. NaNs are left for the imputer rather than being
+    zero-filled. The explanation is (per-row top features, timing stats) when
+    requested and a trained model is loaded, otherwise None.
+    """
+    if lgbm_model is None or feature_names is None:
+        return (*mock_predict_matrix(X, columns), None)
+
+    positions = [columns.index(feature) for feature in feature_names]
+    X_raw = X[:, positions]
+    X_model = X_raw
+
+    # Apply imputation
+    if imputer:
+        X_model = imputer.transform(X_model)
+
+    # Apply scaling
+    if scaler:
+        X_model = scaler.transform(X_model)
+
+    if variant == "full":
+        model = lgbm_model
+        pred_proba = lgbm_model.predict_proba(X_model)
+        is_sepsis = lgbm_model.classes_[pred_proba.argmax(axis=1)] == 1
+        proba_no_sepsis, proba_sepsis = pred_proba[:, 0], pred_proba[:, 1]
+    else:
+        model = model_variants[variant]["booster"]
+        X_model = np.ascontiguousarray(X_model, dtype=model_variants[variant]["dtype"])
+        proba_sepsis = model.predict(X_model)
+        proba_no_sepsis = 1 - proba_sepsis
+        is_sepsis = proba_sepsis > 0.5
+
+    explanation = None
+    if explain:
+        explanation = explain_matrix(model, X_model, feature_names, raw_values=X_raw, cache_namespace=variant)
+    return is_sepsis, proba_no_sepsis, proba_sepsis, explanation
+
+def mock_predict_matrix(X, columns):
+    """Vectorized fallback based on SIRS criteria"""
+    def column(name, default):
+        if name not in columns:
+            return np.full(len(X), default)
+        values = X[:, columns.index(name)]
+        return np.where(np.isnan(values) | (values == 0), default, values)
+
+    temp = column("Temp", 37.0)
+    hr = column("HR", 70.0)
+    rr = column("Resp", 16.0)
+
+    sirs_score = ((temp > 38.0) | (temp < 36.0)).astype(int) + (hr > 100) + (rr > 20)
+    probability_sepsis = sirs_score / 3
+    return sirs_score >= 2, 1 - probability_sepsis, probability_sepsis
+
+def make_prediction(row_features, explain=False, variant="full"):
+    """Make predictions using the trained LightGBM model"""
+    try:
+        columns = score_columns(row_features.keys())
+        X_row, _ = validate_frame(pd.DataFrame([row_features]), columns)
+        is_sepsis, proba_no_sepsis, proba_sepsis, explanation = predict_matrix(X_row, columns, explain=explain, variant=variant)
+
+        confidence = max(proba_no_sepsis[0], proba_sepsis[0]) * 100
+        result = "Sepsis Detected" if is_sepsis[0] else "No Sepsis"
+
+        return {
+            "prediction": result,
+            "confidence": round(float(confidence), 2),
+            "probability_no_sepsis": round(float(proba_no_sepsis[0]) * 100, 2),
+            "probability_sepsis": round(float(proba_sepsis[0]) * 100, 2),
+            "explanation": explanation[0][0] if explanation else None
+        }
+    except Exception as e:
+        print(f"Prediction error: {str(e)}")
+        traceback.print_exc()
+        return make_mock_prediction(row_features)
+
+def predict_frame(mapped_df, explain=False, variant="full"):
+    """Validate and score a mapped chunk column-wise.
+
+    Returns (result frame, chunk quality counters, explanations or None) where
+    the frame holds the validated inputs followed by the prediction columns.
+    """
+    columns = score_columns(mapped_df.columns)
+    X, quality = validate_frame(mapped_df, columns)
+    is_sepsis, proba_no_sepsis, proba_sepsis, explanation = predict_matrix(X, columns, explain=explain, variant=variant)
+
+    output_columns = list(mapped_df.columns)
+    result_df = pd.DataFrame(X[:, [columns.index(c) for c in output_columns]], columns=output_columns)
+    result_df["Prediction"] = np.where(is_sepsis, "Sepsis Detected", "No Sepsis")
+    result_df["Confidence"] = np.round(np.maximum(proba_no_sepsis, proba_sepsis) * 100, 2)
+    result_df["Probability_Sepsis"] = np.round(proba_sepsis * 100, 2)
+    result_df["Probability_No_Sepsis"] = np.round(proba_no_sepsis * 100, 2)
+    return result_df, quality, explanation
+
+def predict_chunk(mapped_df, row_offset=0, explain=False, variant="full"):
+    """Score a mapped chunk into JSON-ready records.
+
+    Returns (prediction records, chunk quality counters, explanation stats or None).
+    """
+    result_df, quality, explanation = predict_frame(mapped_df, explain=explain, variant=variant)
+    result_df.insert(0, "row", np.arange(row_offset, row_offset + len(result_df)))
+
+    # NaN is not valid JSON, send nulls instead
+    result_df = result_df.astype(object).where(result_df.notna(), None)
+    records = result_df.to_dict("records")
+
+    if explanation is None:
+        return records, quality, None
+    explanations, explain_stats = explanation
+    for record, row_explanation in zip(records, explanations):
+        record["Explanation"] = row_explanation
+    return records, quality, explain_stats
+
+class TopRiskRecords:
+    """The `limit` highest-risk records predicted as sepsis, kept in a min-heap"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._heap = []
+
+    def add(self, records):
+        for record in records:
+            if record["Prediction"] != "Sepsis Detected":
+                continue
+            # Earlier rows win ties; rows are unique so the record is never compared
+            entry = (record["Probability_Sepsis"], -record["row"], record)
+            if len(self._heap) < self.limit:
+                heapq.heappush(self._heap, entry)
+            elif self._heap and entry[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, entry)
+
+    def records(self):
+        """Kept records in row order"""
+        return sorted((entry[2] for entry in self._heap), key=lambda record: record["row"])
+
+def explain_records(records, columns, variant="full"):
+    """Explain already scored records from the mapped input values they carry.
+
+    Returns (explanations, stats); explanations are None without a trained model.
+    """
+    no_stats = {"time_s": 0.0, "cache_hits": 0, "cache_misses": 0, "explained_rows": 0}
+    if not records:
+        return [], no_stats
+    mapped_df = pd.DataFrame([{column: record.get(column) for column in columns} for record in records],
+                             columns=columns)
+    _, _, explanation = predict_frame(mapped_df, explain=True, variant=variant)
+    if explanation is None:
+        return [None] * len(records), no_stats
+    return explanation
+
+def make_mock_prediction(features):
+    """Fallback mock prediction based on SIRS criteria"""
+    temp = features.get("Temp", 37.0) or 37.0
+    hr = features.get("HR", 70.0) or 70.0
+    rr = features.get("Resp", 16.0) or 16.0
+    
+    sirs_score = 0
+    if temp > 38.0 or temp < 36.0:
+        sirs_score += 1
+    if hr > 100:
+        sirs_score += 1
+    if rr > 20:
+        sirs_score += 1
+    
+    prediction = "Sepsis Detected" if sirs_score >= 2 else "No Sepsis"
+    confidence = (sirs_score / 3) * 100 if sirs_score > 0 else 0
+    
+    return {
+        "prediction": prediction,
+        "confidence": round(confidence, 2),
+        "probability_no_sepsis": round((1 - sirs_score/3) * 100, 2),
+        "probability_sepsis": round((sirs_score / 3) * 100, 2)
+    }
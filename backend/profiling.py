@@ -0,0 +1,153 @@
+"""
+Opt-in per-request profiling for the prediction endpoints.
+
+Profiling is only wired in when the server is started with SEPSIS_PROFILING=1.
+Otherwise `profiled` returns the view function unchanged, so production builds
+pay nothing for it. When enabled, a request is profiled only if it sends the
+`X-Profile: 1` header or the `?profile=1` query flag.
+
+tracemalloc is process-wide, so only one request is profiled at a time. A
+profile request arriving while another is being profiled is served normally
+and answered with `X-Profile-Skipped: busy` instead of a report. Allocations
+made by concurrent unprofiled requests still show up in the memory figures.
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+from flask import jsonify, make_response, request
+
+PROFILING_ENABLED = os.environ.get("SEPSIS_PROFILING", "0") == "1"
+PROFILE_DIR = Path(os.environ.get("SEPSIS_PROFILE_DIR", Path(__file__).parent / "profiles"))
+TOP_N = int(os.environ.get("SEPSIS_PROFILE_TOP_N", "25"))
+
+# Held for the whole of a profiled request; tracemalloc cannot be shared
+_profile_lock = threading.Lock()
+
+
+def _profile_requested():
+    """Check whether the current request asked to be profiled"""
+    flag = request.headers.get("X-Profile") or request.args.get("profile")
+    return flag is not None and flag.lower() in ("1", "true", "yes")
+
+
+def _top_functions(profiler):
+    """Top functions by cumulative time from a finished profiler"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, lineno, funcname), (cc, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{funcname} ({Path(filename).name}:{lineno})",
+            "calls": ncalls,
+            "primitive_calls": cc,
+            "total_time_s": round(tottime, 6),
+            "cumulative_time_s": round(cumtime, 6),
+        })
+    rows.sort(key=lambda r: r["cumulative_time_s"], reverse=True)
+    return rows[:TOP_N]
+
+
+def _top_allocations(snapshot):
+    """Top allocation sites by size from a tracemalloc snapshot"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    sites = []
+    for stat in snapshot.statistics("lineno")[:TOP_N]:
+        frame = stat.traceback[0]
+        sites.append({
+            "site": f"{Path(frame.filename).name}:{frame.lineno}",
+            "size_kb": round(stat.size / 1024, 2),
+            "count": stat.count,
+        })
+    return sites
+
+
+def _save_report(report):
+    """Write a report to PROFILE_DIR and return its id"""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = PROFILE_DIR / f"{report['id']}.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report_path
+
+
+def profiled(view):
+    """Wrap a Flask view so it can be profiled on demand"""
+    if not PROFILING_ENABLED:
+        return view
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _profile_requested():
+            return view(*args, **kwargs)
+
+        if not _profile_lock.acquire(blocking=False):
+            response = make_response(view(*args, **kwargs))
+            response.headers["X-Profile-Skipped"] = "busy"
+            return response
+
+        try:
+            already_tracing = tracemalloc.is_tracing()
+            if not already_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            profiler = cProfile.Profile()
+
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = make_response(view(*args, **kwargs))
+            finally:
+                profiler.disable()
+                elapsed = time.perf_counter() - start
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                if not already_tracing:
+                    tracemalloc.stop()
+        finally:
+            _profile_lock.release()
+
+        report = {
+            "id": uuid.uuid4().hex,
+            "endpoint": request.path,
+            "method": request.method,
+            "wall_time_s": round(elapsed, 6),
+            "peak_memory_kb": round(peak / 1024, 2),
+            "top_functions": _top_functions(profiler),
+            "top_allocations": _top_allocations(snapshot),
+        }
+        report_path = _save_report(report)
+        print(f"Profile report saved: {report_path} ({elapsed:.3f}s, peak {peak / 1024 / 1024:.1f} MB)")
+
+        response.headers["X-Profile-Id"] = report["id"]
+        return response
+
+    return wrapper
+
+
+def register_profile_routes(app):
+    """Expose stored profile reports when profiling is enabled"""
+    if not PROFILING_ENABLED:
+        return
+
+    @app.route("/api/profiles/<report_id>", methods=["GET"])
+    def get_profile(report_id):
+        """Return a stored profile report"""
+        report_path = PROFILE_DIR / f"{Path(report_id).name}.json"
+        if not report_path.exists():
+            return jsonify({"error": "Profile report not found"}), 404
+        with open(report_path) as f:
+            return jsonify(json.load(f)), 200
+
+    print(f"✓ Request profiling enabled (reports in {PROFILE_DIR})")
@@ -0,0 +1,234 @@
+"""
+Persistent SQLite store for batch prediction results.
+
+Every batch run gets a run id, and its rows are written chunk by chunk as
+they are scored. Rows are indexed by run together with prediction label,
+confidence, sepsis probability and patient id, so the query endpoints can
+page, filter, sort and aggregate without loading a whole run into memory.
+"""
+
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+RESULTS_DB = Path(os.environ.get("SEPSIS_RESULTS_DB", Path(__file__).parent / "results.db"))
+
+# Upload columns treated as a patient identifier (compared lower-cased)
+PATIENT_ID_COLUMNS = ("patient_id", "patientid", "patient", "subject_id")
+
+# Every sort is served by an index ending in the sort column; WITHOUT ROWID
+# indexes carry the primary key, so ties come back in row order for free
+SORT_COLUMNS = {
+    "row": "row",
+    "confidence": "confidence",
+    "probability_sepsis": "probability_sepsis",
+    "patient_id": "patient_id",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    filename TEXT,
+    created_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    summary TEXT,
+    quality TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    patient_id TEXT,
+    prediction TEXT NOT NULL,
+    confidence REAL,
+    probability_sepsis REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (run_id, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_confidence ON results (run_id, confidence);
+CREATE INDEX IF NOT EXISTS idx_results_probability ON results (run_id, probability_sepsis);
+CREATE INDEX IF NOT EXISTS idx_results_patient ON results (run_id, patient_id);
+CREATE INDEX IF NOT EXISTS idx_results_prediction_confidence
+    ON results (run_id, prediction, confidence);
+CREATE INDEX IF NOT EXISTS idx_results_prediction_probability
+    ON results (run_id, prediction, probability_sepsis);
+"""
+
+
+def find_patient_id_column(columns):
+    """Name of the patient id column in an uploaded CSV, if there is one"""
+    for column in columns:
+        if str(column).lower().strip() in PATIENT_ID_COLUMNS:
+            return column
+    return None
+
+
+class ResultStore:
+    """Batch results in SQLite; each call uses its own connection"""
+
+    def __init__(self, path=RESULTS_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create_run(self, filename):
+        """Register a new run and return its id"""
+        run_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO runs (run_id, filename, created_at, status) VALUES (?, ?, ?, 'running')",
+                (run_id, filename, datetime.now(timezone.utc).isoformat()),
+            )
+        return run_id
+
+    def add_rows(self, run_id, records, patient_ids=None):
+        """Insert one chunk of prediction records in a single transaction"""
+        if patient_ids is None:
+            patient_ids = [None] * len(records)
+        rows = (
+            (
+                run_id,
+                record["row"],
+                patient_id,
+                record["Prediction"],
+                record["Confidence"],
+                record["Probability_Sepsis"],
+                json.dumps(record, default=float),
+            )
+            for record, patient_id in zip(records, patient_ids)
+        )
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO results (run_id, row, patient_id, prediction, confidence, probability_sepsis, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def update_rows(self, run_id, records):
+        """Rewrite the stored data of records that were already added"""
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE results SET data = ? WHERE run_id = ? AND row = ?",
+                ((json.dumps(record, default=float), run_id, record["row"]) for record in records),
+            )
+
+    def finish_run(self, run_id, quality=None, status="complete"):
+        """Record the final row count and precomputed summary of a run"""
+        summary = self.summary(run_id) if status == "complete" else None
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET status = ?, row_count = ?, summary = ?, quality = ? WHERE run_id = ?",
+                (
+                    status,
+                    summary["total"] if summary else 0,
+                    json.dumps(summary) if summary else None,
+                    json.dumps(quality) if quality is not None else None,
+                    run_id,
+                ),
+            )
+        return summary
+
+    def get_run(self, run_id):
+        """Run metadata, or None if the run does not exist"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        run = dict(row)
+        for key in ("summary", "quality"):
+            run[key] = json.loads(run[key]) if run[key] else None
+        return run
+
+    @staticmethod
+    def _filters(run_id, prediction=None, min_confidence=None, max_confidence=None, patient_id=None):
+        clauses, params = ["run_id = ?"], [run_id]
+        if prediction is not None:
+            clauses.append("prediction = ?")
+            params.append(prediction)
+        if min_confidence is not None:
+            clauses.append("confidence >= ?")
+            params.append(min_confidence)
+        if max_confidence is not None:
+            clauses.append("confidence <= ?")
+            params.append(max_confidence)
+        if patient_id is not None:
+            clauses.append("patient_id = ?")
+            params.append(patient_id)
+        return " AND ".join(clauses), params
+
+    def query(self, run_id, page=1, page_size=100, sort="row", order="asc", **filters):
+        """One page of matching rows plus the total number of matches"""
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort}' (allowed: {', '.join(SORT_COLUMNS)})")
+        direction = "DESC" if str(order).lower() == "desc" else "ASC"
+        where, params = self._filters(run_id, **filters)
+        order_by = f"row {direction}" if sort == "row" else f"{SORT_COLUMNS[sort]} {direction}, row {direction}"
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM results WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT data FROM results WHERE {where} "
+                f"ORDER BY {order_by} LIMIT ? OFFSET ?",
+                params + [page_size, (page - 1) * page_size],
+            ).fetchall()
+        return [json.loads(row["data"]) for row in rows], total
+
+    def summary(self, run_id, **filters):
+        """Counts and mean confidence/probability per prediction label"""
+        where, params = self._filters(run_id, **filters)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT prediction, COUNT(*) AS count, AVG(confidence) AS avg_confidence, "
+                f"AVG(probability_sepsis) AS avg_probability_sepsis "
+                f"FROM results WHERE {where} GROUP BY prediction",
+                params,
+            ).fetchall()
+
+        by_prediction = {
+            row["prediction"]: {
+                "count": row["count"],
+                "avg_confidence": round(row["avg_confidence"] or 0, 2),
+                "avg_probability_sepsis": round(row["avg_probability_sepsis"] or 0, 2),
+            }
+            for row in rows
+        }
+        total = sum(entry["count"] for entry in by_prediction.values())
+        return {
+            "total": total,
+            "sepsisDetected": by_prediction.get("Sepsis Detected", {}).get("count", 0),
+            "noSepsis": by_prediction.get("No Sepsis", {}).get("count", 0),
+            "by_prediction": by_prediction,
+        }
+
+    def iter_rows(self, run_id, batch_size=5000):
+        """Yield every stored record of a run in row order"""
+        last_row = -1
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT row, data FROM results WHERE run_id = ? AND row > ? ORDER BY row LIMIT ?",
+                    (run_id, last_row, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield json.loads(row["data"])
+            last_row = rows[-1]["row"]
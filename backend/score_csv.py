@@ -0,0 +1,202 @@
+"""
+Offline bulk scoring of CSV files with the trained models in backend/models.
+
+Uses the same column mapping, validation and model loading as the Flask app,
+without the HTTP round trip. Files are scored in a process pool with a bounded
+number in flight, and each result is written next to its input as
+<name>.scored.csv (or .scored.parquet). Finished outputs are skipped on the
+next run, so an interrupted job can simply be restarted.
+
+Parquet needs one schema for the whole file, while pandas infers dtypes per
+chunk. A first pass therefore decides each input column's type: float64 if
+every chunk parsed it as numeric (or empty), otherwise string.
+
+Usage:
+    python backend/score_csv.py exports/                    # every CSV in a directory
+    python backend/score_csv.py "exports/2024-*.csv" --format parquet --workers 8
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import pandas as pd
+
+SCORED_SUFFIX = ".scored"
+PREDICTION_COLUMNS = ["Prediction", "Confidence", "Probability_Sepsis", "Probability_No_Sepsis"]
+NUMERIC_PREDICTION_COLUMNS = PREDICTION_COLUMNS[1:]
+
+
+def find_inputs(patterns):
+    """Expand directories and glob patterns to input CSVs, skipping our own outputs"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "*.csv"))
+        else:
+            matches = glob.glob(pattern)
+        paths.extend(Path(p) for p in matches if not Path(p).stem.endswith(SCORED_SUFFIX))
+    return sorted(set(paths))
+
+
+def output_path(input_path, fmt):
+    """Where the scored copy of an input file goes"""
+    return input_path.with_name(f"{input_path.stem}{SCORED_SUFFIX}.{fmt}")
+
+
+def text_columns(input_path, chunk_size):
+    """Input columns that are not numeric in every chunk of the file"""
+    text = set()
+    for chunk_df in pd.read_csv(input_path, chunksize=chunk_size):
+        text.update(c for c in chunk_df.columns if not pd.api.types.is_numeric_dtype(chunk_df[c]))
+    return text
+
+
+def parquet_schema(columns, text):
+    """Fixed output schema: text columns as strings, everything else float64"""
+    import pyarrow as pa
+
+    fields = [pa.field(str(c), pa.string() if c in text else pa.float64()) for c in columns]
+    fields.append(pa.field("Prediction", pa.string()))
+    fields.extend(pa.field(c, pa.float64()) for c in NUMERIC_PREDICTION_COLUMNS)
+    return pa.schema(fields)
+
+
+def score_file(input_path, out_path, fmt, variant, chunk_size):
+    """Score one CSV chunk by chunk and atomically write the result.
+
+    Runs in a worker process. Returns (input path, rows scored, seconds).
+    """
+    # Inherited from the parent when forked; loaded once per worker otherwise
+    from inference import map_columns, predict_frame
+
+    start = time.perf_counter()
+    tmp_path = out_path.with_name(f".{out_path.name}.tmp")
+    rows = 0
+    writer = None
+    read_options = {}
+    if fmt == "parquet":
+        text = text_columns(input_path, chunk_size)
+        # Keep text columns verbatim (no "007" -> 7.0) in the second pass
+        read_options["dtype"] = {c: str for c in text}
+    try:
+        for chunk_idx, chunk_df in enumerate(pd.read_csv(input_path, chunksize=chunk_size, **read_options)):
+            mapped_df = map_columns(chunk_df)
+            if mapped_df.empty:
+                predictions = pd.DataFrame(index=chunk_df.index, columns=PREDICTION_COLUMNS)
+            else:
+                result_df, _, _ = predict_frame(mapped_df, variant=variant)
+                predictions = result_df[PREDICTION_COLUMNS].set_axis(chunk_df.index)
+            output_df = pd.concat([chunk_df, predictions], axis=1)
+
+            if fmt == "csv":
+                output_df.to_csv(tmp_path, mode="w" if chunk_idx == 0 else "a", header=chunk_idx == 0, index=False)
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                if writer is None:
+                    schema = parquet_schema(chunk_df.columns, text)
+                    writer = pq.ParquetWriter(tmp_path, schema)
+                numeric = [c for c in output_df.columns if c not in text and c != "Prediction"]
+                output_df[numeric] = output_df[numeric].astype("float64")
+                writer.write_table(pa.Table.from_pandas(output_df, schema=schema, preserve_index=False))
+            rows += len(output_df)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if rows == 0:
+        # Still write an output so an empty input counts as done
+        empty_df = pd.DataFrame(columns=PREDICTION_COLUMNS)
+        if fmt == "csv":
+            empty_df.to_csv(tmp_path, index=False)
+        else:
+            empty_df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, out_path)
+    return str(input_path), rows, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score CSV files offline with the trained sepsis model")
+    parser.add_argument("inputs", nargs="+", help="CSV files, directories or glob patterns")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="Output format")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--queue-size", type=int, default=None,
+                        help="Max files in flight (default: 2 x workers)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows read per chunk")
+    parser.add_argument("--variant", default="full", help="Model variant (see /api/health)")
+    parser.add_argument("--overwrite", action="store_true", help="Rescore files that already have output")
+    args = parser.parse_args()
+
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            sys.exit("Parquet output requires pyarrow: pip install pyarrow")
+
+    # Load the models before forking so workers share them
+    from inference import model_variants
+    if args.variant != "full" and args.variant not in model_variants:
+        sys.exit(f"Unknown model variant '{args.variant}' (available: {', '.join(['full'] + sorted(model_variants))})")
+
+    inputs = find_inputs(args.inputs)
+    if not inputs:
+        sys.exit("No input CSV files found")
+
+    pending = []
+    for input_path in inputs:
+        out_path = output_path(input_path, args.format)
+        if out_path.exists() and not args.overwrite:
+            continue
+        pending.append((input_path, out_path))
+    print(f"{len(inputs)} input files, {len(inputs) - len(pending)} already scored, {len(pending)} to do")
+    if not pending:
+        return
+
+    queue_size = args.queue_size or 2 * args.workers
+    total_rows = 0
+    failures = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        in_flight = {}
+        todo = iter(pending)
+        while True:
+            # Keep at most queue_size files submitted at once
+            for input_path, out_path in todo:
+                future = executor.submit(
+                    score_file, input_path, out_path, args.format, args.variant, args.chunk_size
+                )
+                in_flight[future] = input_path
+                if len(in_flight) >= queue_size:
+                    break
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                input_path = in_flight.pop(future)
+                try:
+                    path, rows, seconds = future.result()
+                except Exception as e:
+                    failures += 1
+                    print(f"  ✗ {input_path}: {str(e)}")
+                    continue
+                total_rows += rows
+                elapsed = time.perf_counter() - start
+                print(f"  ✓ {path}: {rows:,} rows in {seconds:.1f}s "
+                      f"(total {total_rows:,} rows, {total_rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"\nScored {total_rows:,} rows from {len(pending) - failures} files in {elapsed:.1f}s "
+          f"({total_rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    if failures:
+        sys.exit(f"{failures} files failed; rerun to retry them")
+
+
+if __name__ == "__main__":
+    main()
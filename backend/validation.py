@@ -0,0 +1,112 @@
+"""
+Columnar input validation for prediction requests.
+
+Each chunk is validated one column at a time with NumPy: values are coerced to
+float, physiologically impossible readings are flagged and turned into NaN so
+the imputer handles them, and missingness is counted. No per-row Python work.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Inclusive bounds outside of which a reading cannot be a real measurement
+PHYSIOLOGICAL_RANGES = {
+    "hour": (0, None),
+    "HR": (0, 300),
+    "O2Sat": (0, 100),
+    "Temp": (25, 45),
+    "SBP": (0, 300),
+    "MAP": (0, 300),
+    "DBP": (0, 300),
+    "Resp": (0, 100),
+    "EtCO2": (0, 150),
+    "BaseExcess": (-50, 50),
+    "HCO3": (0, 70),
+    "FiO2": (0, 1),
+    "pH": (6.5, 8.0),
+    "PaCO2": (0, 200),
+    "SaO2": (0, 100),
+    "AST": (0, 20000),
+    "BUN": (0, 300),
+    "Alkalinephos": (0, 5000),
+    "Calcium": (0, 30),
+    "Chloride": (40, 200),
+    "Creatinine": (0, 50),
+    "Bilirubin_direct": (0, 60),
+    "Glucose": (0, 2000),
+    "Lactate": (0, 40),
+    "Magnesium": (0, 20),
+    "Phosphate": (0, 30),
+    "Potassium": (0, 15),
+    "Bilirubin_total": (0, 80),
+    "TroponinI": (0, 500),
+    "Hct": (0, 100),
+    "Hgb": (0, 30),
+    "PTT": (0, 250),
+    "WBC": (0, 500),
+    "Fibrinogen": (0, 2000),
+    "Platelets": (0, 3000),
+    "Age": (0, 120),
+}
+
+QUALITY_COUNTERS = ("rows", "missing", "non_numeric", "out_of_range", "below_range", "above_range")
+
+
+def validate_frame(df, columns):
+    """Coerce and range-check the given columns of a mapped chunk.
+
+    Returns a float matrix with one column per entry in `columns` (invalid or
+    absent values are NaN) and a per-column dict of quality counters.
+    """
+    n_rows = len(df)
+    X = np.full((n_rows, len(columns)), np.nan)
+    quality = {}
+
+    for j, column in enumerate(columns):
+        counts = dict.fromkeys(QUALITY_COUNTERS, 0)
+        counts["rows"] = n_rows
+        quality[column] = counts
+
+        if column not in df.columns:
+            counts["missing"] = n_rows
+            continue
+
+        raw = df[column]
+        values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        missing = np.isnan(values)
+        counts["missing"] = int(np.count_nonzero(raw.isna().to_numpy()))
+        counts["non_numeric"] = int(np.count_nonzero(missing)) - counts["missing"]
+
+        low, high = PHYSIOLOGICAL_RANGES.get(column, (None, None))
+        with np.errstate(invalid="ignore"):
+            below = values < low if low is not None else np.zeros(n_rows, dtype=bool)
+            above = values > high if high is not None else np.zeros(n_rows, dtype=bool)
+        counts["below_range"] = int(np.count_nonzero(below))
+        counts["above_range"] = int(np.count_nonzero(above))
+        counts["out_of_range"] = counts["below_range"] + counts["above_range"]
+        # `values` may be read-only or a view of the caller's frame, so never write to it
+        X[:, j] = np.where(below | above, np.nan, values)
+
+    return X, quality
+
+
+def merge_quality(total, chunk_quality):
+    """Accumulate a chunk's quality counters into a running total"""
+    for column, counts in chunk_quality.items():
+        running = total.setdefault(column, dict.fromkeys(QUALITY_COUNTERS, 0))
+        for key in QUALITY_COUNTERS:
+            running[key] += counts[key]
+    return total
+
+
+def summarize_quality(total):
+    """Add rates to accumulated counters for the response payload"""
+    summary = {}
+    for column, counts in total.items():
+        rows = counts["rows"] or 1
+        summary[column] = {
+            **counts,
+            "missing_rate": round(counts["missing"] / rows, 4),
+            "invalid_rate": round((counts["non_numeric"] + counts["out_of_range"]) / rows, 4),
+        }
+    return summary
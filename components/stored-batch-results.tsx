@@ -0,0 +1,175 @@
+"use client"
+
+import { useEffect, useState } from "react"
+import { Card } from "@/components/ui/card"
+import { Badge } from "@/components/ui/badge"
+import { Button } from "@/components/ui/button"
+import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table"
+import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select"
+
+interface StoredPrediction {
+  row: number
+  patient_id?: string | null
+  Prediction: string
+  Confidence: number
+  Probability_Sepsis: number
+  [key: string]: unknown
+}
+
+interface RunSummary {
+  total: number
+  sepsisDetected: number
+  noSepsis: number
+  by_prediction: Record<string, { count: number; avg_confidence: number; avg_probability_sepsis: number }>
+}
+
+const PAGE_SIZE = 50
+
+// Shows a batch run stored by the Flask backend, fetching one page at a time
+export function StoredBatchResults({ backendUrl, runId }: { backendUrl: string; runId: string }) {
+  const [rows, setRows] = useState<StoredPrediction[]>([])
+  const [summary, setSummary] = useState<RunSummary | null>(null)
+  const [page, setPage] = useState(1)
+  const [totalPages, setTotalPages] = useState(1)
+  const [prediction, setPrediction] = useState("all")
+  const [sort, setSort] = useState("row")
+  const [loading, setLoading] = useState(false)
+  const [error, setError] = useState<string | null>(null)
+
+  const filterParams = () => {
+    const params = new URLSearchParams()
+    if (prediction !== "all") params.set("prediction", prediction)
+    return params
+  }
+
+  useEffect(() => {
+    fetch(`${backendUrl}/api/results/${runId}/summary?${filterParams()}`)
+      .then((response) => response.json())
+      .then((data) => setSummary(data.summary))
+      .catch(() => setSummary(null))
+  }, [backendUrl, runId, prediction])
+
+  useEffect(() => {
+    const params = filterParams()
+    params.set("page", String(page))
+    params.set("page_size", String(PAGE_SIZE))
+    params.set("sort", sort)
+    params.set("order", sort === "row" ? "asc" : "desc")
+
+    setLoading(true)
+    fetch(`${backendUrl}/api/results/${runId}?${params}`)
+      .then(async (response) => {
+        const data = await response.json()
+        if (!response.ok) throw new Error(data.error || "Failed to load results")
+        setRows(data.predictions || [])
+        setTotalPages(Math.max(data.total_pages, 1))
+        setError(null)
+      })
+      .catch((err) => setError(err instanceof Error ? err.message : "An error occurred"))
+      .finally(() => setLoading(false))
+  }, [backendUrl, runId, page, prediction, sort])
+
+  return (
+    <div className="space-y-6">
+      {summary && (
+        <div className="grid grid-cols-2 md:grid-cols-3 gap-4">
+          <Card className="p-4 border border-border">
+            <p className="text-sm text-muted-foreground">Patients</p>
+            <p className="text-2xl font-bold text-foreground">{summary.total.toLocaleString()}</p>
+          </Card>
+          <Card className="p-4 border border-destructive/20 bg-destructive/5">
+            <p className="text-sm text-muted-foreground">Sepsis Detected</p>
+            <p className="text-2xl font-bold text-destructive">{summary.sepsisDetected.toLocaleString()}</p>
+          </Card>
+          <Card className="p-4 border border-green-600/20 bg-green-600/5">
+            <p className="text-sm text-muted-foreground">No Sepsis</p>
+            <p className="text-2xl font-bold text-green-600">{summary.noSepsis.toLocaleString()}</p>
+          </Card>
+        </div>
+      )}
+
+      <div className="flex flex-wrap items-center gap-3">
+        <Select
+          value={prediction}
+          onValueChange={(value) => {
+            setPrediction(value)
+            setPage(1)
+          }}
+        >
+          <SelectTrigger className="w-48">
+            <SelectValue placeholder="Prediction" />
+          </SelectTrigger>
+          <SelectContent>
+            <SelectItem value="all">All predictions</SelectItem>
+            <SelectItem value="Sepsis Detected">Sepsis Detected</SelectItem>
+            <SelectItem value="No Sepsis">No Sepsis</SelectItem>
+          </SelectContent>
+        </Select>
+        <Select
+          value={sort}
+          onValueChange={(value) => {
+            setSort(value)
+            setPage(1)
+          }}
+        >
+          <SelectTrigger className="w-48">
+            <SelectValue placeholder="Sort by" />
+          </SelectTrigger>
+          <SelectContent>
+            <SelectItem value="row">Row order</SelectItem>
+            <SelectItem value="probability_sepsis">Highest sepsis risk</SelectItem>
+            <SelectItem value="confidence">Highest confidence</SelectItem>
+          </SelectContent>
+        </Select>
+      </div>
+
+      {error && <p className="text-sm text-destructive">{error}</p>}
+
+      <div className="overflow-x-auto border border-border rounded-lg">
+        <Table>
+          <TableHeader>
+            <TableRow>
+              <TableHead>Row</TableHead>
+              <TableHead>Patient</TableHead>
+              <TableHead>Prediction</TableHead>
+              <TableHead className="text-right">Confidence</TableHead>
+              <TableHead className="text-right">P(Sepsis)</TableHead>
+            </TableRow>
+          </TableHeader>
+          <TableBody>
+            {rows.map((row) => (
+              <TableRow key={row.row}>
+                <TableCell>{row.row + 1}</TableCell>
+                <TableCell>{row.patient_id ?? "-"}</TableCell>
+                <TableCell>
+                  <Badge variant={row.Prediction === "Sepsis Detected" ? "destructive" : "secondary"}>
+                    {row.Prediction}
+                  </Badge>
+                </TableCell>
+                <TableCell className="text-right">{row.Confidence.toFixed(1)}%</TableCell>
+                <TableCell className="text-right">{row.Probability_Sepsis.toFixed(1)}%</TableCell>
+              </TableRow>
+            ))}
+          </TableBody>
+        </Table>
+      </div>
+
+      <div className="flex items-center justify-between">
+        <Button variant="outline" size="sm" disabled={page <= 1 || loading} onClick={() => setPage(page - 1)}>
+          Previous
+        </Button>
+        <span className="text-sm text-muted-foreground">
+          Page {page} of {totalPages}
+        </span>
+        <Button
+          variant="outline"
+          size="sm"
+          disabled={page >= totalPages || loading}
+          onClick={() => setPage(page + 1)}
+        >
+          Next
+        </Button>
+      </div>
+    </div>
+  )
+}
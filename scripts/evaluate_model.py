@@ -0,0 +1,227 @@
+"""
+Cross-validated evaluation of the LightGBM sepsis model.
+
+Runs stratified, patient-grouped k-fold cross-validation with the folds trained
+in parallel threads. The dataset is binned once into a single lgb.Dataset and
+every fold trains on a subset of it, so feature binning is never repeated.
+The imputer and scaler are fit once on all rows rather than per fold; scaling
+does not change tree splits, but the imputed medians see the validation rows.
+Out-of-fold probabilities are then swept over decision thresholds, and the
+results are written to backend/models/metrics.json, which /api/metrics serves.
+
+Pass the same --params and --neg-ratio as train_real_model.py so the folds are
+trained (and weighted) like the served model; both are recorded in
+metrics.json. Models updated with train_incremental.py are not re-evaluated.
+
+Usage:
+    python scripts/evaluate_model.py --folds 5 --parallel 5
+    python scripts/evaluate_model.py --neg-ratio 0.2 --params '{"n_estimators": 400}'
+"""
+
+import argparse
+import json
+import os
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+from sklearn.metrics import roc_auc_score, average_precision_score
+from sklearn.model_selection import StratifiedGroupKFold
+
+from pipeline_stages import impute_stage, load_stage, scale_stage
+from sampling import subsample_training_set
+from sepsis_data import LGBM_PARAMS
+from stage_cache import DEFAULT_CACHE_DIR, StageCache
+
+warnings.filterwarnings('ignore')
+
+MODEL_DIR = Path(__file__).parent.parent / "backend" / "models"
+METRICS_PATH = MODEL_DIR / "metrics.json"
+
+
+def train_params(model_params, num_threads):
+    """LGBMClassifier parameters translated for lgb.train (class balancing is done with weights)"""
+    params = {k: v for k, v in model_params.items() if k not in ('class_weight', 'n_estimators', 'n_jobs')}
+    params.update(objective='binary', num_threads=num_threads)
+    return params, model_params.get('n_estimators', 100)
+
+
+def fold_training_rows(y, groups, train_idx, class_weight, neg_ratio):
+    """Training rows and sample weights of one fold, as train_real_model.py builds them"""
+    if neg_ratio < 1 or class_weight == 'balanced':
+        # Subsampling always folds class balancing into the weights
+        keep, sample_weight = subsample_training_set(y[train_idx], groups[train_idx], neg_ratio)
+        return train_idx[keep], sample_weight
+    if class_weight is None:
+        return train_idx, None
+    return train_idx, np.array([class_weight.get(label, 1.0) for label in y[train_idx]])
+
+
+def threshold_sweep(y, proba, thresholds):
+    """Confusion-matrix metrics at every threshold from one sort of the scores"""
+    y = np.asarray(y)
+    order = np.argsort(-proba, kind='stable')
+    sorted_proba = proba[order]
+    true_positives_at = np.cumsum(y[order])
+    positives = true_positives_at[-1] if len(y) else 0
+    negatives = len(y) - positives
+
+    # Rows predicted positive at threshold t are those with proba >= t
+    predicted_positive = np.searchsorted(-sorted_proba, -thresholds, side='right')
+    tp = np.where(predicted_positive > 0, true_positives_at[np.maximum(predicted_positive - 1, 0)], 0)
+    fp = predicted_positive - tp
+    tn = negatives - fp
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(positives > 0, tp / max(positives, 1), 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        specificity = np.where(negatives > 0, tn / max(negatives, 1), 0.0)
+    accuracy = (tp + tn) / max(len(y), 1)
+
+    return {
+        'threshold': thresholds,
+        'accuracy': accuracy,
+        'precision': precision,
+        'recall': recall,
+        'specificity': specificity,
+        'f1': f1,
+    }
+
+
+def point_metrics(sweep, index):
+    """Metrics of a single row of a threshold sweep"""
+    return {name: round(float(values[index]), 4) for name, values in sweep.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Patient-grouped k-fold evaluation of the LightGBM model")
+    parser.add_argument("--data", default="Dataset.csv")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--parallel", type=int, default=None, help="Folds trained at once (default: all)")
+    parser.add_argument("--target-recall", type=float, default=0.8,
+                        help="Also report the most precise threshold reaching this recall")
+    parser.add_argument("--neg-ratio", type=float, default=1.0,
+                        help="Share of sepsis-free patients kept in each training fold (as in train_real_model.py)")
+    parser.add_argument("--params", type=json.loads, default={},
+                        help="JSON object of LightGBM parameters overriding the defaults")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Stage cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every stage")
+    args = parser.parse_args()
+    n_parallel = min(args.parallel or args.folds, args.folds)
+
+    print("=" * 70)
+    print(f"{args.folds}-FOLD PATIENT-GROUPED EVALUATION")
+    print("=" * 70)
+
+    print("\n1. Loading and preprocessing dataset...")
+    cache = StageCache(None if args.no_cache else args.cache_dir)
+    loaded, load_key = load_stage(cache, args.data)
+    imputed, impute_key = impute_stage(cache, loaded, load_key)
+    X = scale_stage(cache, imputed, impute_key)[0]["X"]
+    y = np.asarray(loaded["y"])
+    groups = np.asarray(loaded["groups"])
+    if not loaded["has_groups"]:
+        print("   Warning: no patient id column, folds are split by row")
+    print(f"   Rows: {len(y):,}, positives: {int(y.sum()):,}")
+
+    print("\n2. Binning dataset once for all folds...")
+    start = time.perf_counter()
+    model_params = {**LGBM_PARAMS, **args.params}
+    num_threads = max(1, (os.cpu_count() or 1) // n_parallel)
+    params, num_rounds = train_params(model_params, num_threads)
+    full_set = lgb.Dataset(
+        X, label=y, feature_name=list(loaded["feature_names"]),
+        params=params, free_raw_data=False
+    ).construct()
+    print(f"   Binned in {time.perf_counter() - start:.1f}s")
+
+    splitter = StratifiedGroupKFold(n_splits=args.folds, shuffle=True, random_state=42)
+    folds = list(splitter.split(np.zeros(len(y)), y, groups))
+    # Subsets share the parent's bin mappers; build them up front, one at a time
+    train_sets = []
+    for train_idx, _ in folds:
+        rows, sample_weight = fold_training_rows(y, groups, train_idx, model_params.get('class_weight'), args.neg_ratio)
+        train_set = full_set.subset(rows).construct()
+        if sample_weight is not None:
+            train_set.set_weight(sample_weight)
+        train_sets.append(train_set)
+
+    def run_fold(fold):
+        _, val_idx = folds[fold]
+        fold_start = time.perf_counter()
+        booster = lgb.train(params, train_sets[fold], num_boost_round=num_rounds)
+        proba = booster.predict(X[val_idx])
+        return fold, proba, time.perf_counter() - fold_start
+
+    print(f"\n3. Training {args.folds} folds ({n_parallel} at a time, {num_threads} threads each)...")
+    oof_proba = np.zeros(len(y))
+    fold_results = []
+    thresholds = np.round(np.arange(0.01, 1.0, 0.01), 2)
+    default_index = int(np.argmin(np.abs(thresholds - 0.5)))
+    with ThreadPoolExecutor(max_workers=n_parallel) as executor:
+        for fold, proba, fold_time in executor.map(run_fold, range(args.folds)):
+            val_idx = folds[fold][1]
+            oof_proba[val_idx] = proba
+            fold_metrics = point_metrics(threshold_sweep(y[val_idx], proba, thresholds), default_index)
+            fold_metrics['auroc'] = round(float(roc_auc_score(y[val_idx], proba)), 4)
+            fold_metrics['rows'] = int(len(val_idx))
+            fold_metrics['train_time_s'] = round(fold_time, 2)
+            fold_results.append(fold_metrics)
+            print(f"   Fold {fold + 1}: auroc={fold_metrics['auroc']:.4f} recall={fold_metrics['recall']:.4f} "
+                  f"({fold_time:.1f}s)")
+
+    print("\n4. Sweeping decision thresholds over out-of-fold probabilities...")
+    sweep = threshold_sweep(y, oof_proba, thresholds)
+    best_f1_index = int(np.argmax(sweep['f1']))
+    reaching_recall = np.flatnonzero(sweep['recall'] >= args.target_recall)
+    recall_index = int(reaching_recall[np.argmax(sweep['precision'][reaching_recall])]) if reaching_recall.size else None
+
+    at_default = point_metrics(sweep, default_index)
+    auroc = round(float(roc_auc_score(y, oof_proba)), 4)
+    print(f"   AUROC: {auroc:.4f}")
+    print(f"   At 0.50: precision={at_default['precision']:.4f} recall={at_default['recall']:.4f}")
+    print(f"   Best F1 {sweep['f1'][best_f1_index]:.4f} at threshold {thresholds[best_f1_index]:.2f}")
+
+    metrics = {
+        'LightGBM': {
+            'accuracy': at_default['accuracy'],
+            'precision': at_default['precision'],
+            'recall': at_default['recall'],
+            'f1': at_default['f1'],
+            'auroc': auroc,
+            'average_precision': round(float(average_precision_score(y, oof_proba)), 4),
+        },
+        'evaluation': {
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'method': f'{args.folds}-fold stratified group k-fold (by patient); '
+                      'median imputation fit on all rows before splitting',
+            'rows': int(len(y)),
+            'params': model_params,
+            'neg_ratio': args.neg_ratio,
+            'positives': int(y.sum()),
+            'folds': fold_results,
+            'best_f1_threshold': point_metrics(sweep, best_f1_index),
+            'target_recall': args.target_recall,
+            'target_recall_threshold': point_metrics(sweep, recall_index) if recall_index is not None else None,
+            'threshold_sweep': {name: [round(float(v), 4) for v in values] for name, values in sweep.items()},
+        },
+    }
+
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = METRICS_PATH.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(metrics, f, indent=2)
+    os.replace(tmp_path, METRICS_PATH)
+    print(f"\n   Metrics saved: {METRICS_PATH}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except FileNotFoundError:
+        print("ERROR: Dataset.csv not found. Please ensure the file is in the current directory.")
@@ -0,0 +1,23 @@
+"""
+Editing LightGBM models through their text representation.
+"""
+
+import lightgbm as lgb
+
+
+def rewrite_model_string(booster, rewrite):
+    """New Booster with `key=value` lines of the model text rewritten.
+
+    `rewrite(key, value)` is called for every line in order and returns the
+    new value, or None to keep the line as it is. The tree_sizes header holds
+    byte offsets of the original trees, so it is dropped and LightGBM parses
+    the rewritten trees sequentially instead of aborting on a size mismatch.
+    """
+    lines = []
+    for line in booster.model_to_string().split("\n"):
+        key, _, value = line.partition("=")
+        if key == "tree_sizes":
+            continue
+        new_value = rewrite(key, value)
+        lines.append(line if new_value is None else f"{key}={new_value}")
+    return lgb.Booster(model_str="\n".join(lines))
@@ -0,0 +1,146 @@
+"""
+Smaller serving variants of the trained LightGBM model.
+
+- full:      every tree, float64 inputs (what the backend serves by default)
+- compact:   the fewest trees whose validation AUROC is within a tolerance of
+             the best point on the validation curve, scored on float32 inputs
+- compact_q: compact with split thresholds and leaf values stored as float32.
+             Thresholds are rounded down to the nearest float32, so for
+             float32 inputs every split decision is unchanged.
+
+build_variants() also benchmarks each variant so accuracy can be traded for
+latency explicitly; see variant_report.json next to the model files.
+"""
+
+import time
+
+import lightgbm as lgb
+import numpy as np
+from sklearn.metrics import precision_score, recall_score, roc_auc_score
+
+from model_text import rewrite_model_string
+
+AUROC_TOLERANCE = 0.002
+CURVE_STEP = 10
+
+
+def truncate_booster(booster, num_trees):
+    """Booster keeping only the first num_trees iterations"""
+    return lgb.Booster(model_str=booster.model_to_string(num_iteration=num_trees))
+
+
+def quantize_booster(booster):
+    """Booster with float32 thresholds (rounded down) and float32 leaf values"""
+    def rewrite(key, value):
+        if key == "threshold":
+            thresholds = np.array(value.split(), dtype=np.float64)
+            snapped = thresholds.astype(np.float32)
+            above = snapped.astype(np.float64) > thresholds
+            snapped[above] = np.nextafter(snapped[above], np.float32(-np.inf))
+            return " ".join(repr(float(t)) for t in snapped)
+        if key == "leaf_value":
+            leaves = np.array(value.split(), dtype=np.float64).astype(np.float32)
+            return " ".join(repr(float(v)) for v in leaves)
+        return None
+
+    return rewrite_model_string(booster, rewrite)
+
+
+def validation_curve(booster, X_val, y_val, step=CURVE_STEP):
+    """AUROC of the model truncated to every `step` trees"""
+    total = booster.current_iteration()
+    sizes = sorted(set(list(range(step, total, step)) + [total]))
+    return sizes, [roc_auc_score(y_val, booster.predict(X_val, num_iteration=k)) for k in sizes]
+
+
+def choose_num_trees(sizes, aurocs, tolerance=AUROC_TOLERANCE):
+    """Fewest trees within `tolerance` of the best validation AUROC"""
+    best = max(aurocs)
+    return next(k for k, auc in zip(sizes, aurocs) if auc >= best - tolerance)
+
+
+def benchmark(booster, X, dtype, single_row_repeats=200, batch_repeats=3):
+    """Single-row latency percentiles and batch throughput"""
+    X = np.ascontiguousarray(X, dtype=dtype)
+    row = X[:1]
+    booster.predict(row)  # Warm up
+
+    latencies = []
+    for _ in range(single_row_repeats):
+        start = time.perf_counter()
+        booster.predict(row)
+        latencies.append(time.perf_counter() - start)
+
+    batch_time = min(_timed(booster.predict, X) for _ in range(batch_repeats))
+    return {
+        'latency_p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 4),
+        'latency_p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 4),
+        'throughput_rows_per_s': round(len(X) / max(batch_time, 1e-9)),
+        'input_bytes_per_row': int(X.itemsize * X.shape[1]),
+    }
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def quality(booster, X, y, dtype):
+    """AUROC, precision and recall at 0.5"""
+    proba = booster.predict(np.asarray(X, dtype=dtype))
+    pred = (proba >= 0.5).astype(int)
+    return {
+        'auroc': round(float(roc_auc_score(y, proba)), 4),
+        'precision': round(float(precision_score(y, pred, zero_division=0)), 4),
+        'recall': round(float(recall_score(y, pred, zero_division=0)), 4),
+    }
+
+
+def build_variants(model, X_val, y_val, X_report, y_report, benchmark_rows=50000):
+    """Create serving variants and a latency/accuracy report.
+
+    Tree count is chosen on (X_val, y_val); the report is computed on
+    (X_report, y_report) so the choice does not flatter the numbers.
+    Returns (variants to serve, report).
+    """
+    full = model.booster_
+    sizes, aurocs = validation_curve(full, X_val, y_val)
+    num_trees = choose_num_trees(sizes, aurocs)
+    compact = truncate_booster(full, num_trees)
+
+    candidates = {
+        'full': (full, np.float64),
+        'compact': (compact, np.float32),
+        'compact_q': (quantize_booster(compact), np.float32),
+    }
+
+    X_bench = X_report[:benchmark_rows]
+    report = {
+        'validation_curve': {'num_trees': sizes, 'auroc': [round(float(a), 4) for a in aurocs]},
+        'auroc_tolerance': AUROC_TOLERANCE,
+        'variants': {},
+    }
+    for name, (booster, dtype) in candidates.items():
+        entry = {
+            'num_trees': booster.current_iteration(),
+            'dtype': np.dtype(dtype).name,
+            'model_bytes': len(booster.model_to_string().encode()),
+            **quality(booster, X_report, y_report, dtype),
+            **benchmark(booster, X_bench, dtype),
+        }
+        report['variants'][name] = entry
+
+    baseline = report['variants']['full']
+    for entry in report['variants'].values():
+        entry['auroc_delta'] = round(entry['auroc'] - baseline['auroc'], 4)
+        entry['recall_delta'] = round(entry['recall'] - baseline['recall'], 4)
+        entry['speedup_single_row'] = round(baseline['latency_p50_ms'] / max(entry['latency_p50_ms'], 1e-9), 2)
+        entry['speedup_batch'] = round(entry['throughput_rows_per_s'] / max(baseline['throughput_rows_per_s'], 1), 2)
+
+    # "full" is served from lightgbm_model.pkl itself
+    variants = {
+        name: {'booster': booster, 'dtype': np.dtype(dtype).name, 'num_trees': booster.current_iteration()}
+        for name, (booster, dtype) in candidates.items() if name != 'full'
+    }
+    return variants, report
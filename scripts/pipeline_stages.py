@@ -0,0 +1,107 @@
+"""
+Cacheable preprocessing stages of the LightGBM training pipeline.
+
+Every stage takes the key of the stage it depends on, so changing the dataset
+invalidates everything downstream while changing only model parameters reuses
+all of it. Stage results are plain dicts of arrays and fitted objects; see
+stage_cache.StageCache.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.model_selection import GroupShuffleSplit, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from preprocessing_stats import PreprocessingStats
+from sampling import subsample_training_set
+from sepsis_data import DROP_COLUMNS, TARGET, feature_columns, load_dataset, split_features
+from stage_cache import hash_parts
+
+# Bump when a stage's computation changes so stale entries are not reused
+STAGE_VERSION = 1
+
+
+def load_stage(cache, path, chunk_size=100000):
+    """Read the CSV and keep labeled rows as a raw feature matrix"""
+    key = hash_parts("load", STAGE_VERSION, cache.file_digest(path), DROP_COLUMNS, TARGET)
+
+    def compute():
+        df = load_dataset(path, chunk_size=chunk_size)
+        X, y, groups = split_features(df)
+        has_groups = groups is not None
+        # Integer codes so the array can be memory-mapped
+        group_codes = pd.factorize(groups)[0] if has_groups else np.arange(len(y))
+        objects = {
+            "feature_names": feature_columns(df),
+            "n_rows": len(df),
+            "has_groups": has_groups,
+        }
+        return {"X": X, "y": y, "groups": group_codes}, objects
+
+    return cache.run("load", key, compute), key
+
+
+def impute_stage(cache, loaded, load_key):
+    """Median imputation plus the sufficient statistics for incremental updates"""
+    key = hash_parts("impute", STAGE_VERSION, load_key, "median")
+
+    def compute():
+        X = np.asarray(loaded["X"])
+        preprocessing_stats = PreprocessingStats.fit(X, loaded["feature_names"])
+        preprocessing_stats.rows_seen = loaded["n_rows"]
+        imputer = SimpleImputer(strategy='median')
+        X_imputed = imputer.fit_transform(X)
+        objects = {
+            "imputer": imputer,
+            "preprocessing_stats": preprocessing_stats,
+            "missing_before": int(np.isnan(X).sum()),
+        }
+        return {"X": X_imputed}, objects
+
+    return cache.run("impute", key, compute), key
+
+
+def scale_stage(cache, imputed, impute_key):
+    """Standardize the imputed features"""
+    key = hash_parts("scale", STAGE_VERSION, impute_key, "standard")
+
+    def compute():
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(np.asarray(imputed["X"]))
+        return {"X": X_scaled}, {"scaler": scaler}
+
+    return cache.run("scale", key, compute), key
+
+
+def split_stage(cache, loaded, load_key, test_size=0.2, random_state=42, neg_ratio=1.0):
+    """Train/test row indices, optionally with subsampled negatives and sample weights.
+
+    Subsampling splits by patient so no patient's hours end up on both sides.
+    """
+    key = hash_parts("split", STAGE_VERSION, load_key, test_size, random_state, neg_ratio)
+
+    def compute():
+        y = np.asarray(loaded["y"])
+        groups = np.asarray(loaded["groups"])
+        rows = np.arange(len(y))
+        subsampling = neg_ratio < 1
+
+        if subsampling and loaded["has_groups"]:
+            splitter = GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+            train_idx, test_idx = next(splitter.split(rows, y, groups))
+        else:
+            train_idx, test_idx = train_test_split(
+                rows, test_size=test_size, random_state=random_state, stratify=y
+            )
+
+        arrays = {"train_idx": train_idx, "test_idx": test_idx}
+        if subsampling:
+            keep, sample_weight = subsample_training_set(
+                y[train_idx], groups[train_idx] if loaded["has_groups"] else None, neg_ratio, random_state
+            )
+            arrays["train_idx"] = train_idx[keep]
+            arrays["sample_weight"] = sample_weight
+        return arrays, None
+
+    return cache.run("split", key, compute), key
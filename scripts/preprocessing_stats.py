@@ -0,0 +1,107 @@
+"""
+Sufficient statistics for the imputer and scaler.
+
+Lets incremental training update the median imputer and the standard scaler
+from newly appended rows without rereading the whole dataset. Per feature we
+keep the count, sum and sum of squares of observed values, the number of
+missing values, and a fixed-bin histogram from which the median is estimated.
+"""
+
+import copy
+
+import numpy as np
+
+N_BINS = 4096
+
+
+class PreprocessingStats:
+    """Mergeable per-feature statistics for median imputation and scaling"""
+
+    def __init__(self, feature_names, bin_edges):
+        self.feature_names = list(feature_names)
+        self.bin_edges = np.asarray(bin_edges, dtype=np.float64)
+        n_features = len(self.feature_names)
+        self.observed = np.zeros(n_features, dtype=np.int64)
+        self.missing = np.zeros(n_features, dtype=np.int64)
+        self.sum = np.zeros(n_features, dtype=np.float64)
+        self.sum_sq = np.zeros(n_features, dtype=np.float64)
+        self.histogram = np.zeros((n_features, self.bin_edges.shape[1] - 1), dtype=np.int64)
+        self.rows_seen = 0
+
+    @classmethod
+    def fit(cls, X, feature_names, n_bins=N_BINS):
+        """Build statistics from a raw (unimputed) feature matrix"""
+        X = np.asarray(X, dtype=np.float64)
+        low = np.nanmin(X, axis=0)
+        high = np.nanmax(X, axis=0)
+        # All-missing features get a dummy range
+        low = np.where(np.isnan(low), 0.0, low)
+        high = np.where(np.isnan(high), 1.0, high)
+        high = np.where(high > low, high, low + 1.0)
+        bin_edges = np.linspace(low, high, n_bins + 1, axis=1)
+
+        stats = cls(feature_names, bin_edges)
+        stats.update(X)
+        return stats
+
+    def update(self, X):
+        """Fold new raw rows into the statistics"""
+        X = np.asarray(X, dtype=np.float64)
+        n_bins = self.histogram.shape[1]
+        for j in range(X.shape[1]):
+            values = X[:, j]
+            values = values[~np.isnan(values)]
+            self.missing[j] += X.shape[0] - values.size
+            self.observed[j] += values.size
+            self.sum[j] += values.sum()
+            self.sum_sq[j] += np.square(values).sum()
+
+            # Values outside the original range land in the edge bins
+            bins = np.searchsorted(self.bin_edges[j], values, side="right") - 1
+            self.histogram[j] += np.bincount(np.clip(bins, 0, n_bins - 1), minlength=n_bins)
+        self.rows_seen += X.shape[0]
+        return self
+
+    def medians(self):
+        """Median of observed values per feature, interpolated within a bin"""
+        medians = np.zeros(len(self.feature_names))
+        for j, counts in enumerate(self.histogram):
+            total = counts.sum()
+            if total == 0:
+                continue
+            cumulative = np.cumsum(counts)
+            half = total / 2
+            b = int(np.searchsorted(cumulative, half))
+            before = cumulative[b - 1] if b > 0 else 0
+            fraction = (half - before) / counts[b] if counts[b] else 0.0
+            left, right = self.bin_edges[j, b], self.bin_edges[j, b + 1]
+            medians[j] = left + fraction * (right - left)
+        return medians
+
+    def imputed_moments(self, medians=None):
+        """Mean and variance of the features after median imputation"""
+        if medians is None:
+            medians = self.medians()
+        n = self.observed + self.missing
+        total = self.sum + self.missing * medians
+        total_sq = self.sum_sq + self.missing * np.square(medians)
+        mean = total / np.maximum(n, 1)
+        var = np.maximum(total_sq / np.maximum(n, 1) - np.square(mean), 0.0)
+        return mean, var, n
+
+    def apply(self, imputer, scaler):
+        """Return copies of a fitted imputer and scaler using these statistics"""
+        medians = self.medians()
+        mean, var, n = self.imputed_moments(medians)
+        scale = np.sqrt(var)
+        scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+
+        imputer = copy.deepcopy(imputer)
+        imputer.statistics_ = medians
+
+        scaler = copy.deepcopy(scaler)
+        scaler.mean_ = mean
+        scaler.var_ = var
+        scaler.scale_ = scale
+        scaler.n_samples_seen_ = int(n.max())
+        return imputer, scaler
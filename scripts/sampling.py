@@ -0,0 +1,64 @@
+"""
+Patient-level negative subsampling with importance weights.
+
+Most rows in the sepsis dataset belong to patients who never develop sepsis.
+Dropping a share of those patients (never individual hours, which would leak
+temporal context between train and test) and up-weighting the remaining ones
+by the inverse sampling rate keeps the expected loss the same as training on
+every row. Combined with the class-balancing weights, the result matches the
+class_weight='balanced' full-data model, whose probabilities are not
+calibrated to the true sepsis base rate.
+"""
+
+import numpy as np
+
+
+def balanced_class_weights(y):
+    """Class weights matching LightGBM's class_weight='balanced' for these labels"""
+    classes, counts = np.unique(y, return_counts=True)
+    return dict(zip(classes.tolist(), (len(y) / (len(classes) * counts)).tolist()))
+
+
+def subsample_negative_patients(y, groups, ratio, random_state=42):
+    """Keep every patient with a positive label and a `ratio` share of the rest.
+
+    Returns (positions of kept rows, importance weights for the kept rows).
+    If `groups` is None every row is treated as its own patient.
+    """
+    if not 0 < ratio <= 1:
+        raise ValueError(f"ratio must be in (0, 1], got {ratio}")
+
+    y = np.asarray(y)
+    groups = np.arange(len(y)) if groups is None else np.asarray(groups)
+
+    positive_patients = np.unique(groups[y == 1])
+    negative_patients = np.setdiff1d(np.unique(groups), positive_patients)
+    if ratio == 1 or len(negative_patients) == 0:
+        return np.arange(len(y)), np.ones(len(y))
+
+    rng = np.random.default_rng(random_state)
+    n_keep = max(1, int(round(len(negative_patients) * ratio)))
+    kept_patients = rng.choice(negative_patients, size=n_keep, replace=False)
+    effective_ratio = n_keep / len(negative_patients)
+
+    from_negative = np.isin(groups, negative_patients)
+    keep = ~from_negative | np.isin(groups, kept_patients)
+    weights = np.where(from_negative, 1.0 / effective_ratio, 1.0)
+    return np.flatnonzero(keep), weights[keep]
+
+
+def subsample_training_set(y, groups, ratio, random_state=42):
+    """Subsample negatives and fold class balancing into per-row sample weights.
+
+    Class weights are computed on the full training labels, so training with
+    class_weight=None and these weights matches class_weight='balanced' on
+    all rows in expectation.
+    """
+    y = np.asarray(y)
+    class_weights = balanced_class_weights(y)
+    classes = np.array(sorted(class_weights))
+    weight_lookup = np.array([class_weights[c] for c in classes])
+
+    keep, importance = subsample_negative_patients(y, groups, ratio, random_state)
+    sample_weight = importance * weight_lookup[np.searchsorted(classes, y[keep])]
+    return keep, sample_weight
@@ -0,0 +1,56 @@
+"""
+Dataset loading and model settings shared by the LightGBM training scripts.
+"""
+
+import gc
+
+import numpy as np
+import pandas as pd
+
+TARGET = 'SepsisLabel'
+GROUP_COLUMN = 'Patient_ID'
+DROP_COLUMNS = ['Unnamed: 0', 'Patient_ID', 'ICULOS', 'Hour']
+
+# LightGBM parameters used by train_real_model.py
+LGBM_PARAMS = dict(
+    n_estimators=200,
+    learning_rate=0.05,
+    max_depth=7,  # Reduced depth for large datasets
+    num_leaves=31,  # Limited leaves to prevent overfitting
+    subsample=0.8,
+    colsample_bytree=0.8,
+    random_state=42,
+    verbose=-1,
+    class_weight='balanced',
+    n_jobs=-1,  # Use all CPU cores
+    min_child_samples=20  # Prevent overfitting on large data
+)
+
+
+def load_dataset(path="Dataset.csv", chunk_size=100000, verbose=True):
+    """Read the dataset in chunks to keep peak memory down"""
+    chunks = []
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        if verbose:
+            print(f"   Loaded {len(chunk)} rows...")
+        chunks.append(chunk)
+        gc.collect()  # Free memory after each chunk
+    return pd.concat(chunks, ignore_index=True)
+
+
+def feature_columns(df):
+    """Model feature columns of a raw dataset frame"""
+    return [c for c in df.columns if c not in DROP_COLUMNS and c != TARGET]
+
+
+def split_features(df, feature_names=None):
+    """Return (raw feature matrix, labels, patient ids or None) for labeled rows"""
+    if TARGET not in df.columns:
+        raise ValueError(f"Missing '{TARGET}' column in dataset")
+    df = df[df[TARGET].notna()]
+    groups = df[GROUP_COLUMN].to_numpy() if GROUP_COLUMN in df.columns else None
+    if feature_names is None:
+        feature_names = feature_columns(df)
+    X = df.reindex(columns=feature_names).to_numpy(dtype=np.float64)
+    y = df[TARGET].astype(int).to_numpy()
+    return X, y, groups
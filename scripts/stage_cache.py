@@ -0,0 +1,139 @@
+"""
+Content-addressed cache for training pipeline stages.
+
+Each stage result is stored under a key derived from a hash of its inputs
+(the dataset contents or the key of the stage it was computed from) and its
+parameters. Arrays are saved as .npy files and loaded back memory-mapped, so
+a cache hit costs almost nothing; fitted objects (imputer, scaler, ...) are
+stored with joblib. When the cache grows past its size limit the least
+recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path(".stage_cache")
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3
+
+
+def hash_parts(*parts):
+    """Stable hash of JSON-serializable key parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class StageCache:
+    """On-disk stage cache; pass root=None to compute every stage uncached"""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root is not None else None
+        self.max_bytes = max_bytes
+        if self.root is not None:
+            self.root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.root is not None
+
+    def file_digest(self, path):
+        """SHA-256 of a file's contents, memoized on (path, size, mtime)"""
+        path = Path(path).resolve()
+        stat = path.stat()
+        memo_key = hash_parts(str(path), stat.st_size, stat.st_mtime_ns)
+        if not self.enabled:
+            # Keys are never looked up, so skip reading the file
+            return memo_key
+        memo_path = self.root / "digests" / memo_key
+        if memo_path.exists():
+            return memo_path.read_text()
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest = digest.hexdigest()
+
+        memo_path.parent.mkdir(exist_ok=True)
+        memo_path.write_text(digest)
+        return digest
+
+    def _entry(self, stage, key):
+        return self.root / f"{stage}-{key}"
+
+    def load(self, stage, key):
+        """Return the stored {name: array or object} for a stage, or None"""
+        if not self.enabled:
+            return None
+        entry = self._entry(stage, key)
+        if not (entry / "meta.json").exists():
+            return None
+
+        meta = json.loads((entry / "meta.json").read_text())
+        result = {name: np.load(entry / f"{name}.npy", mmap_mode="r") for name in meta["arrays"]}
+        if meta["objects"]:
+            result.update(joblib.load(entry / "objects.pkl"))
+        os.utime(entry / "meta.json")  # Mark as recently used
+        return result
+
+    def store(self, stage, key, arrays, objects=None):
+        """Persist a stage result atomically, then enforce the size limit"""
+        if not self.enabled:
+            return
+        entry = self._entry(stage, key)
+        tmp = self.root / f".tmp-{uuid.uuid4().hex}"
+        tmp.mkdir()
+        for name, array in arrays.items():
+            np.save(tmp / f"{name}.npy", np.asarray(array), allow_pickle=False)
+        if objects:
+            joblib.dump(objects, tmp / "objects.pkl")
+        meta = {"stage": stage, "arrays": list(arrays), "objects": bool(objects), "created": time.time()}
+        (tmp / "meta.json").write_text(json.dumps(meta))
+
+        try:
+            tmp.rename(entry)
+        except OSError:
+            # Another run stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def run(self, stage, key, compute):
+        """Load a stage result from the cache or compute and store it.
+
+        `compute` returns (arrays, objects). Arrays come back memory-mapped
+        on a hit, so callers must not modify them in place.
+        """
+        cached = self.load(stage, key)
+        if cached is not None:
+            print(f"   [cache] {stage}: hit ({key[:12]})")
+            return cached
+
+        arrays, objects = compute()
+        self.store(stage, key, arrays, objects)
+        if self.enabled:
+            print(f"   [cache] {stage}: stored ({key[:12]})")
+        return {**arrays, **(objects or {})}
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        entries = []
+        for entry in self.root.glob("*-*"):
+            meta = entry / "meta.json"
+            if entry.is_dir() and not entry.name.startswith(".") and meta.exists():
+                size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+                entries.append((meta.stat().st_mtime, size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            print(f"   [cache] evicted {entry.name}")
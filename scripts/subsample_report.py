@@ -0,0 +1,120 @@
+"""
+Report the training time / quality tradeoff of negative patient subsampling.
+
+Trains the LightGBM model once per ratio on the same patient-grouped split and
+compares fit time, ranking quality and calibration against training on every
+row (ratio 1.0). The result is printed and saved to
+backend/models/subsample_report.json.
+
+Usage:
+    python scripts/subsample_report.py --ratios 1.0 0.5 0.25 0.1
+"""
+
+import argparse
+import json
+import time
+import warnings
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+from sklearn.metrics import (average_precision_score, brier_score_loss, log_loss,
+                             precision_score, recall_score, roc_auc_score)
+from sklearn.model_selection import GroupShuffleSplit
+
+from pipeline_stages import impute_stage, load_stage, scale_stage
+from sampling import subsample_training_set
+from sepsis_data import LGBM_PARAMS
+from stage_cache import DEFAULT_CACHE_DIR, StageCache
+
+warnings.filterwarnings('ignore')
+
+MODEL_DIR = Path(__file__).parent.parent / "backend" / "models"
+
+
+def expected_calibration_error(y, proba, n_bins=10):
+    """Weighted mean gap between predicted and observed rates over probability bins"""
+    bins = np.minimum((proba * n_bins).astype(int), n_bins - 1)
+    counts = np.bincount(bins, minlength=n_bins)
+    predicted = np.bincount(bins, weights=proba, minlength=n_bins)
+    observed = np.bincount(bins, weights=y, minlength=n_bins)
+    filled = counts > 0
+    gaps = np.abs(predicted[filled] - observed[filled]) / counts[filled]
+    return float(np.sum(gaps * counts[filled]) / len(y))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare negative subsampling ratios")
+    parser.add_argument("--data", default="Dataset.csv")
+    parser.add_argument("--ratios", type=float, nargs="+", default=[1.0, 0.5, 0.25, 0.1, 0.05])
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Stage cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every stage")
+    args = parser.parse_args()
+    ratios = sorted(set(args.ratios) | {1.0}, reverse=True)
+
+    print("=" * 70)
+    print("NEGATIVE SUBSAMPLING TRADEOFF REPORT")
+    print("=" * 70)
+
+    print("\n1. Loading and preprocessing dataset...")
+    cache = StageCache(None if args.no_cache else args.cache_dir)
+    loaded, load_key = load_stage(cache, args.data)
+    if not loaded["has_groups"]:
+        print("   Warning: no patient id column, splitting and subsampling by row")
+    y, groups = np.asarray(loaded["y"]), np.asarray(loaded["groups"])
+    imputed, impute_key = impute_stage(cache, loaded, load_key)
+    X = scale_stage(cache, imputed, impute_key)[0]["X"]
+
+    splitter = GroupShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
+    train_idx, test_idx = next(splitter.split(X, y, groups))
+    X_test, y_test = X[test_idx], y[test_idx]
+    print(f"   Train rows: {len(train_idx):,}, test rows: {len(test_idx):,}")
+
+    print("\n2. Training one model per ratio...")
+    params = {**LGBM_PARAMS, 'class_weight': None}
+    results = []
+    reference_proba = None
+    for ratio in ratios:
+        keep, sample_weight = subsample_training_set(y[train_idx], groups[train_idx], ratio)
+        rows = train_idx[keep]
+
+        model = lgb.LGBMClassifier(**params)
+        start = time.perf_counter()
+        model.fit(X[rows], y[rows], sample_weight=sample_weight)
+        train_time = time.perf_counter() - start
+
+        proba = model.predict_proba(X_test)[:, 1]
+        if reference_proba is None:
+            reference_proba = proba
+        pred = (proba >= 0.5).astype(int)
+
+        result = {
+            'ratio': ratio,
+            'train_rows': int(len(rows)),
+            'train_time_s': round(train_time, 2),
+            'auroc': float(roc_auc_score(y_test, proba)),
+            'average_precision': float(average_precision_score(y_test, proba)),
+            'log_loss': float(log_loss(y_test, proba, labels=[0, 1])),
+            'brier': float(brier_score_loss(y_test, proba)),
+            'ece': expected_calibration_error(y_test, proba),
+            'mean_abs_prob_shift_vs_full': float(np.mean(np.abs(proba - reference_proba))),
+            'precision': float(precision_score(y_test, pred, zero_division=0)),
+            'recall': float(recall_score(y_test, pred, zero_division=0)),
+        }
+        result['speedup_vs_full'] = round(results[0]['train_time_s'] / max(train_time, 1e-9), 2) if results else 1.0
+        results.append(result)
+        print(f"   ratio={ratio:<5} rows={len(rows):>9,} time={train_time:7.1f}s "
+              f"auroc={result['auroc']:.4f} logloss={result['log_loss']:.4f} ece={result['ece']:.4f}")
+
+    report_path = MODEL_DIR / "subsample_report.json"
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump({'test_rows': int(len(test_idx)), 'results': results}, f, indent=2)
+    print(f"\n   Report saved: {report_path}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except FileNotFoundError:
+        print("ERROR: Dataset.csv not found. Please ensure the file is in the current directory.")
@@ -0,0 +1,280 @@
+"""
+Incrementally update the LightGBM sepsis model with newly appended rows.
+
+Continues boosting from backend/models/lightgbm_model.pkl using only the rows
+added to Dataset.csv since the last (full or incremental) training run, and
+updates the imputer and scaler from the stored sufficient statistics instead
+of refitting them on the whole dataset. The reduced serving variants are
+rebuilt from the updated model, since the old ones expect the old scaling.
+Run train_real_model.py once first.
+
+Usage:
+    python scripts/train_incremental.py                      # new rows of Dataset.csv
+    python scripts/train_incremental.py --new-data today.csv # rows from a separate file
+    python scripts/train_incremental.py --compare-full       # also report vs. a full retrain
+"""
+
+import argparse
+import json
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import GroupShuffleSplit, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from model_text import rewrite_model_string
+from model_variants import build_variants
+from sampling import subsample_training_set
+from sepsis_data import split_features
+
+warnings.filterwarnings('ignore')
+
+MODEL_DIR = Path(__file__).parent.parent / "backend" / "models"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Warm-start the LightGBM model on new labeled rows")
+    parser.add_argument("--data", default="Dataset.csv", help="Growing dataset; rows past the last run are used")
+    parser.add_argument("--new-data", help="CSV with only the new rows (overrides --data row tracking)")
+    parser.add_argument("--rounds", type=int, default=50, help="Boosting rounds to add")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of new rows held out for evaluation")
+    parser.add_argument("--neg-ratio", type=float, default=1.0,
+                        help="Share of sepsis-free new patients to train on (as in train_real_model.py)")
+    parser.add_argument("--compare-full", action="store_true", help="Also run a full retrain and report the delta")
+    parser.add_argument("--no-variants", action="store_true", help="Remove the serving variants instead of rebuilding them")
+    return parser.parse_args()
+
+
+def rescale_booster(booster, old_scaler, new_scaler):
+    """Rewrite split thresholds so trees fit on old scaling accept new scaling.
+
+    Standardization is affine and increasing per feature, so mapping each
+    threshold through raw space keeps every split decision identical.
+    """
+    factor = old_scaler.scale_ / new_scaler.scale_
+    shift = (old_scaler.mean_ - new_scaler.mean_) / new_scaler.scale_
+
+    def convert(values, features):
+        return values * factor[features] + shift[features]
+
+    features = None
+
+    def rewrite(key, value):
+        nonlocal features
+        if key == "Tree":
+            features = None
+        elif key == "num_cat" and int(value) > 0:
+            raise ValueError("Cannot rescale categorical splits")
+        elif key == "split_feature":
+            features = np.array(value.split(), dtype=int)
+        elif key == "threshold" and features is not None:
+            thresholds = convert(np.array(value.split(), dtype=float), features)
+            return " ".join(f"{t:.17g}" for t in thresholds)
+        elif key == "feature_infos":
+            infos = []
+            for j, info in enumerate(value.split()):
+                if info.startswith("[") and ":" in info:
+                    low, high = (float(v) for v in info[1:-1].split(":"))
+                    low, high = convert(np.array([low, high]), np.array([j, j]))
+                    info = f"[{low:.17g}:{high:.17g}]"
+                infos.append(info)
+            return " ".join(infos)
+        return None
+
+    return rewrite_model_string(booster, rewrite)
+
+
+def evaluate(model, imputer, scaler, X, y):
+    """Quality metrics on raw feature rows"""
+    X_scaled = scaler.transform(imputer.transform(X))
+    proba = model.predict_proba(X_scaled)[:, 1]
+    pred = (proba >= 0.5).astype(int)
+    return {
+        'auroc': float(roc_auc_score(y, proba)) if len(np.unique(y)) > 1 else None,
+        'precision': float(precision_score(y, pred, zero_division=0)),
+        'recall': float(recall_score(y, pred, zero_division=0)),
+        'f1': float(f1_score(y, pred, zero_division=0)),
+    }
+
+
+def metric_delta(a, b):
+    """Per-metric difference a - b, skipping undefined metrics"""
+    return {k: (a[k] - b[k]) if a[k] is not None and b[k] is not None else None for k in a}
+
+
+def row_groups(groups, n_rows):
+    """Patient ids, or one group per row when the data has none"""
+    return np.arange(n_rows) if groups is None else np.asarray(groups)
+
+
+def full_retrain(args, params, feature_names, rows_before, X_new_train, y_new_train, groups_new_train):
+    """Retrain from scratch on old rows plus new training rows, like train_real_model.py"""
+    if args.new_data:
+        old_df = pd.read_csv(args.data)
+    else:
+        old_df = pd.read_csv(args.data, nrows=rows_before)
+    X_old, y_old, groups_old = split_features(old_df, feature_names)
+    X_all = np.vstack([X_old, X_new_train])
+    y_all = np.concatenate([y_old, y_new_train])
+    # Keep old and new row-only ids apart
+    groups_all = np.concatenate([
+        row_groups(groups_old, len(y_old)).astype(str),
+        np.char.add("new-", groups_new_train.astype(str)),
+    ])
+
+    imputer = SimpleImputer(strategy='median')
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(imputer.fit_transform(X_all))
+    keep, sample_weight = subsample_training_set(y_all, groups_all, args.neg_ratio)
+    model = lgb.LGBMClassifier(**params)
+    model.fit(X_scaled[keep], y_all[keep], sample_weight=sample_weight)
+    return model, imputer, scaler
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 70)
+    print("INCREMENTAL LIGHTGBM TRAINING (WARM START)")
+    print("=" * 70)
+
+    print("\n1. Loading existing model and preprocessing statistics...")
+    base_model = joblib.load(MODEL_DIR / "lightgbm_model.pkl")
+    base_imputer = joblib.load(MODEL_DIR / "imputer.pkl")
+    base_scaler = joblib.load(MODEL_DIR / "scaler.pkl")
+    feature_names = joblib.load(MODEL_DIR / "feature_names.pkl")
+    stats = joblib.load(MODEL_DIR / "preprocessing_stats.pkl")
+    rows_before = stats.rows_seen
+    print(f"   Existing model: {base_model.booster_.num_trees()} trees, {rows_before:,} rows seen")
+
+    print("\n2. Loading new rows...")
+    if args.new_data:
+        new_df = pd.read_csv(args.new_data)
+    else:
+        new_df = pd.read_csv(args.data, skiprows=range(1, rows_before + 1))
+    if new_df.empty:
+        print("   No new rows since the last run. Nothing to do.")
+        return
+    n_new_rows = len(new_df)
+    X_new, y_new, groups_new = split_features(new_df, feature_names)
+    has_groups = groups_new is not None
+    groups_new = row_groups(groups_new, len(y_new))
+    print(f"   New rows: {n_new_rows:,} (positives: {int(y_new.sum()):,})")
+
+    # Hold out whole patients so no patient's hours are both trained on and scored
+    if has_groups:
+        splitter = GroupShuffleSplit(n_splits=1, test_size=args.holdout, random_state=42)
+        train_idx, hold_idx = next(splitter.split(X_new, y_new, groups_new))
+    else:
+        print("   Warning: no Patient_ID column, holding out individual rows")
+        stratify = y_new if len(np.unique(y_new)) > 1 and y_new.sum() >= 2 else None
+        train_idx, hold_idx = train_test_split(
+            np.arange(len(y_new)), test_size=args.holdout, random_state=42, stratify=stratify
+        )
+    X_train, y_train, groups_train = X_new[train_idx], y_new[train_idx], groups_new[train_idx]
+    X_hold, y_hold = X_new[hold_idx], y_new[hold_idx]
+    print(f"   Training on {len(y_train):,} rows, holding out {len(y_hold):,} for evaluation")
+
+    print("\n3. Updating imputer and scaler from sufficient statistics...")
+    stats.update(X_train)
+    imputer, scaler = stats.apply(base_imputer, base_scaler)
+    max_shift = np.max(np.abs(scaler.mean_ - base_scaler.mean_) / base_scaler.scale_)
+    print(f"   Largest mean shift: {max_shift:.4f} standard deviations")
+
+    print(f"\n4. Continuing boosting for {args.rounds} rounds...")
+    start = time.perf_counter()
+    init_booster = rescale_booster(base_model.booster_, base_scaler, scaler)
+    # Balance classes through sample weights whether or not the base model was
+    # trained with class_weight or with subsampling weights (--neg-ratio), so
+    # the added trees are weighted like the existing ones
+    params = {**base_model.get_params(), 'class_weight': None}
+    keep, sample_weight = subsample_training_set(y_train, groups_train, args.neg_ratio)
+    model = lgb.LGBMClassifier(**{**params, 'n_estimators': args.rounds})
+    model.fit(
+        scaler.transform(imputer.transform(X_train[keep])), y_train[keep],
+        sample_weight=sample_weight, init_model=init_booster
+    )
+    incremental_time = time.perf_counter() - start
+    print(f"   Done in {incremental_time:.1f}s, model now has {model.booster_.num_trees()} trees")
+
+    print("\n5. Evaluating on held-out new rows...")
+    report = {
+        'rows_before': int(rows_before),
+        'new_rows': int(n_new_rows),
+        'rounds_added': args.rounds,
+        'incremental_time_s': round(incremental_time, 2),
+        'previous_model': evaluate(base_model, base_imputer, base_scaler, X_hold, y_hold),
+        'incremental_model': evaluate(model, imputer, scaler, X_hold, y_hold),
+    }
+    report['delta_vs_previous'] = metric_delta(report['incremental_model'], report['previous_model'])
+
+    if args.compare_full:
+        print("   Running full retrain for comparison (this can take a while)...")
+        start = time.perf_counter()
+        full_model, full_imputer, full_scaler = full_retrain(
+            args, params, feature_names, rows_before, X_train, y_train, groups_train
+        )
+        report['full_retrain_time_s'] = round(time.perf_counter() - start, 2)
+        report['full_retrain_model'] = evaluate(full_model, full_imputer, full_scaler, X_hold, y_hold)
+        report['delta_vs_full_retrain'] = metric_delta(report['incremental_model'], report['full_retrain_model'])
+
+    for name in ('previous_model', 'incremental_model', 'full_retrain_model'):
+        if name in report:
+            scores = ", ".join(
+                f"{k}={v:.4f}" for k, v in report[name].items() if v is not None
+            )
+            print(f"   {name}: {scores}")
+
+    print("\n6. Saving updated model and preprocessing objects...")
+    # The holdout rows are not trained on, but they are consumed from the dataset
+    stats.rows_seen = rows_before + (0 if args.new_data else n_new_rows)
+    joblib.dump(model, MODEL_DIR / "lightgbm_model.pkl", compress=3)
+    joblib.dump(imputer, MODEL_DIR / "imputer.pkl", compress=3)
+    joblib.dump(scaler, MODEL_DIR / "scaler.pkl", compress=3)
+    joblib.dump(stats, MODEL_DIR / "preprocessing_stats.pkl", compress=3)
+    report_path = MODEL_DIR / "incremental_report.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"   Report saved: {report_path}")
+
+    print("\n7. Updating serving variants...")
+    # Existing variants were fit on the previous scaling and must not outlive it
+    variants_path = MODEL_DIR / "model_variants.pkl"
+    variant_report_path = MODEL_DIR / "variant_report.json"
+    half = len(y_hold) // 2
+    halves_usable = all(len(np.unique(part)) > 1 for part in (y_hold[:half], y_hold[half:]))
+    if args.no_variants or not halves_usable:
+        if not args.no_variants:
+            print("   Warning: held-out rows lack both classes in each half, cannot rebuild variants")
+        variants_path.unlink(missing_ok=True)
+        variant_report_path.unlink(missing_ok=True)
+        print("   Removed stale variants; the backend serves only the full model")
+    else:
+        # Choose the tree count on one half of the holdout, report on the other
+        X_hold_model = scaler.transform(imputer.transform(X_hold))
+        variants, variant_report = build_variants(
+            model, X_hold_model[:half], y_hold[:half], X_hold_model[half:], y_hold[half:]
+        )
+        joblib.dump(variants, variants_path, compress=3)
+        with open(variant_report_path, "w") as f:
+            json.dump(variant_report, f, indent=2)
+        print(f"   Variants saved: {variants_path}")
+
+    print("\n" + "=" * 70)
+    print("INCREMENTAL TRAINING COMPLETED SUCCESSFULLY")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except FileNotFoundError as e:
+        print(f"ERROR: {e}")
+        print("Run scripts/train_real_model.py first to create the base model and statistics.")
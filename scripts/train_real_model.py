@@ -1,19 +1,36 @@
 """
 Train LightGBM model on large sepsis dataset (optimized for 10+ lakh rows).
 This script efficiently handles missing values, features scaling, and saves the model.
+
+Pass --neg-ratio 0.2 to train on every sepsis patient but only 20% of the
+patients who never develop sepsis, re-weighted so the model matches training on
+all rows (class-balanced, like the default run) in expectation.
+See subsample_report.py for the time/quality tradeoff across ratios.
+
+Loading, imputation, scaling and the split are cached in .stage_cache keyed by
+the dataset contents, so a run that only changes --params goes straight to
+fitting, e.g. --params '{"learning_rate": 0.1, "n_estimators": 400}'.
+
+Smaller serving variants (fewer trees, float32 inputs, float32 thresholds) are
+saved to model_variants.pkl with a latency/accuracy comparison in
+variant_report.json; pass --no-variants to skip them.
 """
 
 import pandas as pd
 import numpy as np
 import lightgbm as lgb
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.impute import SimpleImputer
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, classification_report
 import joblib
 from pathlib import Path
+import argparse
+import json
+import time
 import warnings
-import gc
+
+from model_variants import build_variants
+from pipeline_stages import impute_stage, load_stage, scale_stage, split_stage
+from sepsis_data import LGBM_PARAMS
+from stage_cache import DEFAULT_CACHE_DIR, StageCache
 
 warnings.filterwarnings('ignore')
 
@@ -21,98 +38,84 @@ warnings.filterwarnings('ignore')
 MODEL_DIR = Path(__file__).parent.parent / "backend" / "models"
 MODEL_DIR.mkdir(exist_ok=True)
 
+parser = argparse.ArgumentParser(description="Train the LightGBM sepsis model")
+parser.add_argument("--data", default="Dataset.csv", help="Training dataset CSV")
+parser.add_argument("--neg-ratio", type=float, default=1.0,
+                    help="Share of sepsis-free patients to keep for training (default: all)")
+parser.add_argument("--params", type=json.loads, default={},
+                    help="JSON object of LightGBM parameters overriding the defaults")
+parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Stage cache directory")
+parser.add_argument("--cache-max-gb", type=float, default=20, help="Evict cached stages beyond this size")
+parser.add_argument("--no-cache", action="store_true", help="Recompute every stage")
+parser.add_argument("--no-variants", action="store_true", help="Skip building reduced serving variants")
+args = parser.parse_args()
+
 print("=" * 70)
 print("TRAINING LIGHTGBM MODEL ON LARGE SEPSIS DATASET (OPTIMIZED)")
 print("=" * 70)
 
 try:
+    cache = StageCache(None if args.no_cache else args.cache_dir, max_bytes=int(args.cache_max_gb * 1024 ** 3))
+    
     # Load dataset in chunks for memory efficiency
     print("\n1. Loading dataset in chunks (memory-efficient)...")
-    chunks = []
-    chunk_size = 100000  # Process 100k rows at a time
-    
-    for chunk in pd.read_csv("Dataset.csv", chunksize=chunk_size):
-        print(f"   Loaded {len(chunk)} rows...")
-        chunks.append(chunk)
-        gc.collect()  # Free memory after each chunk
-    
-    df = pd.concat(chunks, ignore_index=True)
-    print(f"   Total dataset shape: {df.shape}")
-    print(f"   Columns: {df.columns.tolist()}")
-    
-    # Drop unnecessary columns
-    df = df.drop(columns=['Unnamed: 0', 'Patient_ID'], errors='ignore')
-    print(f"   After dropping unnecessary columns: {df.shape}")
-    
-    # Identify target and features
-    if 'SepsisLabel' not in df.columns:
-        raise ValueError("Missing 'SepsisLabel' column in dataset")
-    
-    target = 'SepsisLabel'
-    X = df.drop(columns=[target, 'ICULOS', 'Hour'], errors='ignore')
-    y = df[target]
+    loaded, load_key = load_stage(cache, args.data, chunk_size=100000)  # Process 100k rows at a time
+    feature_names = loaded["feature_names"]
+    y = np.asarray(loaded["y"])
+    print(f"   Total dataset rows: {loaded['n_rows']:,}")
+    print(f"   Labeled rows kept: {len(y):,}")
     
     print(f"\n2. Feature and target analysis...")
-    print(f"   Features shape: {X.shape}")
-    print(f"   Feature columns: {X.columns.tolist()}")
-    print(f"   Target distribution:\n{y.value_counts()}")
-    print(f"   Class ratio: {y.value_counts(normalize=True)}")
+    print(f"   Features shape: {loaded['X'].shape}")
+    print(f"   Feature columns: {feature_names}")
+    print(f"   Target distribution:\n{pd.Series(y).value_counts()}")
+    print(f"   Class ratio: {pd.Series(y).value_counts(normalize=True)}")
     
     # Handle missing values with median imputation
+    # (also keeps sufficient statistics so train_incremental.py can update preprocessing later)
     print("\n3. Handling missing values with median imputation...")
-    imputer = SimpleImputer(strategy='median')
-    X_imputed = imputer.fit_transform(X)
-    X = pd.DataFrame(X_imputed, columns=X.columns)
-    
-    missing_before = df[X.columns].isnull().sum().sum()
-    print(f"   Missing values before: {missing_before}")
-    print(f"   Missing values after: {X.isnull().sum().sum()}")
-    
-    # Remove rows with extreme values or NaNs in target
-    print("\n4. Cleaning target variable...")
-    y_before = len(y)
-    y = y[~y.isnull()]
-    X = X[y.index]
-    print(f"   Rows before cleaning: {y_before}")
-    print(f"   Rows after cleaning: {len(y)}")
+    imputed, impute_key = impute_stage(cache, loaded, load_key)
+    imputer = imputed["imputer"]
+    preprocessing_stats = imputed["preprocessing_stats"]
+    print(f"   Missing values before: {imputed['missing_before']}")
+    print(f"   Missing values after: {int(np.isnan(imputed['X']).sum())}")
     
     # Standardize features
-    print("\n5. Standardizing features...")
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    X = pd.DataFrame(X_scaled, columns=X.columns)
+    print("\n4. Standardizing features...")
+    scaled, _ = scale_stage(cache, imputed, impute_key)
+    scaler = scaled["scaler"]
+    X = scaled["X"]
     
     # Train-test split
-    print("\n6. Splitting data into train/test sets...")
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-    print(f"   Training set: {X_train.shape[0]:,} samples")
+    print("\n5. Splitting data into train/test sets...")
+    subsampling = args.neg_ratio < 1
+    if subsampling and not loaded["has_groups"]:
+        print("   Warning: no Patient_ID column, subsampling individual rows")
+    split, _ = split_stage(cache, loaded, load_key, test_size=0.2, random_state=42, neg_ratio=args.neg_ratio)
+    train_idx, test_idx = split["train_idx"], split["test_idx"]
+    sample_weight = np.asarray(split["sample_weight"]) if subsampling else None
+    X_train, y_train = X[train_idx], y[train_idx]
+    X_test, y_test = X[test_idx], y[test_idx]
+    print(f"   Training set: {X_train.shape[0]:,} samples" + (" (after subsampling)" if subsampling else ""))
     print(f"   Test set: {X_test.shape[0]:,} samples")
-    print(f"   Training target distribution:\n{y_train.value_counts()}")
-    print(f"   Test target distribution:\n{y_test.value_counts()}")
+    print(f"   Training target distribution:\n{pd.Series(y_train).value_counts()}")
+    print(f"   Test target distribution:\n{pd.Series(y_test).value_counts()}")
     
     # Train LightGBM model with optimized parameters for large dataset
-    print("\n7. Training LightGBM model (large dataset optimized)...")
-    lgbm_model = lgb.LGBMClassifier(
-        n_estimators=200,
-        learning_rate=0.05,
-        max_depth=7,  # Reduced depth for large datasets
-        num_leaves=31,  # Limited leaves to prevent overfitting
-        subsample=0.8,
-        colsample_bytree=0.8,
-        random_state=42,
-        verbose=-1,
-        class_weight='balanced',
-        n_jobs=-1,  # Use all CPU cores
-        min_child_samples=20  # Prevent overfitting on large data
-    )
-    
-    lgbm_model.fit(X_train, y_train)
-    print("   Model training completed")
+    print("\n6. Training LightGBM model (large dataset optimized)...")
+    params = {**LGBM_PARAMS, **args.params}
+    if sample_weight is not None:
+        # Class balancing is already folded into the sample weights
+        params['class_weight'] = None
+    lgbm_model = lgb.LGBMClassifier(**params)
+    
+    start = time.perf_counter()
+    lgbm_model.fit(X_train, y_train, sample_weight=sample_weight, feature_name=feature_names)
+    train_time = time.perf_counter() - start
+    print(f"   Model training completed in {train_time:.1f}s")
     
     # Evaluate on test set
-    print("\n8. Evaluating model on test set...")
+    print("\n7. Evaluating model on test set...")
     y_pred = lgbm_model.predict(X_test)
     y_pred_proba = lgbm_model.predict_proba(X_test)
     
@@ -133,9 +136,9 @@ try:
     print(classification_report(y_test, y_pred))
     
     # Feature importance
-    print("\n9. Feature importance (top 15):")
+    print("\n8. Feature importance (top 15):")
     feature_importance = pd.DataFrame({
-        'feature': X.columns,
+        'feature': feature_names,
         'importance': lgbm_model.feature_importances_
     }).sort_values('importance', ascending=False)
     
@@ -143,17 +146,19 @@ try:
         print(f"   {idx+1}. {row['feature']}: {row['importance']:.4f}")
     
     # Save model and preprocessing objects
-    print("\n10. Saving model and preprocessing objects...")
+    print("\n9. Saving model and preprocessing objects...")
     model_path = MODEL_DIR / "lightgbm_model.pkl"
     scaler_path = MODEL_DIR / "scaler.pkl"
     imputer_path = MODEL_DIR / "imputer.pkl"
     feature_names_path = MODEL_DIR / "feature_names.pkl"
     metrics_path = MODEL_DIR / "model_metrics.pkl"
+    stats_path = MODEL_DIR / "preprocessing_stats.pkl"
     
     joblib.dump(lgbm_model, model_path, compress=3)
     joblib.dump(scaler, scaler_path, compress=3)
     joblib.dump(imputer, imputer_path, compress=3)
-    joblib.dump(X.columns.tolist(), feature_names_path, compress=3)
+    joblib.dump(list(feature_names), feature_names_path, compress=3)
+    joblib.dump(preprocessing_stats, stats_path, compress=3)
     
     # Save metrics for reference
     metrics = {
@@ -161,6 +166,9 @@ try:
         'precision': float(precision),
         'recall': float(recall),
         'f1': float(f1),
+        'neg_ratio': args.neg_ratio,
+        'params': params,
+        'train_time_s': round(train_time, 2),
         'feature_importance': feature_importance.to_dict('records')
     }
     joblib.dump(metrics, metrics_path, compress=3)
@@ -170,6 +178,32 @@ try:
     print(f"   Imputer saved: {imputer_path}")
     print(f"   Feature names saved: {feature_names_path}")
     print(f"   Metrics saved: {metrics_path}")
+    print(f"   Preprocessing stats saved: {stats_path}")
+    
+    if not args.no_variants:
+        # Choose the tree count on one half of the test set, report on the other
+        print("\n10. Building reduced serving variants...")
+        half = len(y_test) // 2
+        variants, variant_report = build_variants(
+            lgbm_model, X_test[:half], y_test[:half], X_test[half:], y_test[half:]
+        )
+        variants_path = MODEL_DIR / "model_variants.pkl"
+        variant_report_path = MODEL_DIR / "variant_report.json"
+        joblib.dump(variants, variants_path, compress=3)
+        with open(variant_report_path, "w") as f:
+            json.dump(variant_report, f, indent=2)
+        
+        for name, entry in variant_report['variants'].items():
+            print(f"   {name:<10} trees={entry['num_trees']:<4} {entry['dtype']:<8} "
+                  f"auroc={entry['auroc']:.4f} ({entry['auroc_delta']:+.4f}) "
+                  f"p50={entry['latency_p50_ms']:.3f}ms {entry['throughput_rows_per_s']:,} rows/s "
+                  f"size={entry['model_bytes'] / 1024:.0f}KB")
+        print(f"   Variants saved: {variants_path}")
+        print(f"   Variant report saved: {variant_report_path}")
+    else:
+        # Variants from an earlier run belong to a different model and scaler
+        (MODEL_DIR / "model_variants.pkl").unlink(missing_ok=True)
+        (MODEL_DIR / "variant_report.json").unlink(missing_ok=True)
     
     print("\n" + "=" * 70)
     print("TRAINING COMPLETED SUCCESSFULLY")
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Scripts and backend modules import their siblings by plain module name
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT / "scripts"), str(ROOT / "backend")]
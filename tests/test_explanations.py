@@ -0,0 +1,22 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+lgb = pytest.importorskip("lightgbm")
+
+from explanations import ContributionCache, explain_matrix
+
+
+def test_explain_matrix_reports_stats_of_the_given_cache():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4))
+    y = (X[:, 0] > 0).astype(int)
+    model = lgb.LGBMClassifier(n_estimators=10, num_leaves=7, verbose=-1).fit(X, y)
+    cache = ContributionCache(max_size=100)
+    names = ["a", "b", "c", "d"]
+
+    _, first = explain_matrix(model.booster_, X[:20], names, cache=cache)
+    explanations, second = explain_matrix(model.booster_, X[:20], names, cache=cache)
+
+    assert (first["cache_hits"], first["cache_misses"]) == (0, 20)
+    assert (second["cache_hits"], second["cache_misses"]) == (20, 0)
+    assert explanations[0]["top_features"][0]["feature"] == "a"
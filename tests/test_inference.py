@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("joblib")
+
+from inference import TopRiskRecords
+
+
+def record(row, probability, prediction="Sepsis Detected"):
+    return {"row": row, "Prediction": prediction, "Probability_Sepsis": probability}
+
+
+def test_top_risk_records_keeps_global_top_across_chunks():
+    candidates = TopRiskRecords(limit=2)
+    candidates.add([record(0, 90.0), record(1, 55.0), record(2, 99.0, "No Sepsis")])
+    candidates.add([record(3, 70.0), record(4, 95.0)])
+    candidates.add([record(5, 90.0), record(6, 60.0)])
+
+    # Ties go to the earlier row; unflagged rows are never kept
+    assert [r["row"] for r in candidates.records()] == [0, 4]
+
+
+def test_top_risk_records_with_zero_limit_keeps_nothing():
+    candidates = TopRiskRecords(limit=0)
+    candidates.add([record(0, 90.0)])
+    assert candidates.records() == []
@@ -0,0 +1,35 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+lgb = pytest.importorskip("lightgbm")
+pytest.importorskip("sklearn")
+
+from model_variants import build_variants, quantize_booster
+
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 5))
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.5, size=600) > 0).astype(int)
+    model = lgb.LGBMClassifier(n_estimators=30, num_leaves=7, verbose=-1)
+    model.fit(X[:400], y[:400])
+    return model, X[400:], y[400:]
+
+
+def test_quantized_booster_keeps_predictions(tiny_model):
+    model, X, _ = tiny_model
+    quantized = quantize_booster(model.booster_)
+    X32 = X.astype(np.float32)
+    np.testing.assert_allclose(quantized.predict(X32), model.booster_.predict(X32), rtol=1e-5)
+
+
+def test_build_variants_on_tiny_model(tiny_model):
+    model, X, y = tiny_model
+    variants, report = build_variants(model, X[:100], y[:100], X[100:], y[100:], benchmark_rows=50)
+
+    assert set(variants) == {"compact", "compact_q"}
+    assert set(report["variants"]) == {"full", "compact", "compact_q"}
+    for variant in variants.values():
+        proba = variant["booster"].predict(X.astype(variant["dtype"]))
+        assert proba.shape == (len(X),)
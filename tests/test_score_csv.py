@@ -0,0 +1,30 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+pytest.importorskip("joblib")
+
+from score_csv import output_path, score_file
+
+
+def test_parquet_output_survives_dtype_drift_between_chunks(tmp_path):
+    # Chunk 1 has an all-integer Age and an empty Unit column; chunk 2 brings
+    # a blank Age (float with NaN) and text in Unit
+    input_path = tmp_path / "patients.csv"
+    input_path.write_text(
+        "HR,Temp,Resp,Age,Unit\n"
+        "80,37.0,16,61,\n"
+        "120,39.1,24,70,\n"
+        "95,38.2,22,,MICU\n"
+        "70,36.8,14,45,SICU\n"
+    )
+    out_path = output_path(input_path, "parquet")
+
+    _, rows, _ = score_file(input_path, out_path, "parquet", "full", chunk_size=2)
+
+    result = pd.read_parquet(out_path)
+    assert rows == 4
+    assert result["Age"].isna().tolist() == [False, False, True, False]
+    assert result["Age"].iloc[0] == 61
+    assert result["Unit"].tolist()[2:] == ["MICU", "SICU"]
+    assert result["Prediction"].notna().all()
@@ -0,0 +1,28 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+lgb = pytest.importorskip("lightgbm")
+pytest.importorskip("sklearn")
+from sklearn.preprocessing import StandardScaler
+
+from train_incremental import rescale_booster
+
+
+def test_rescaled_booster_matches_on_rescaled_inputs():
+    rng = np.random.default_rng(0)
+    X_old = rng.normal(size=(500, 4)) * [1, 10, 100, 0.1] + [0, 50, -20, 3]
+    y = (X_old[:, 0] + X_old[:, 1] / 10 > 5).astype(int)
+    X_new = np.vstack([X_old, rng.normal(size=(200, 4)) * [2, 5, 50, 0.2] + [1, 40, 0, 3]])
+
+    old_scaler = StandardScaler().fit(X_old)
+    new_scaler = StandardScaler().fit(X_new)
+    model = lgb.LGBMClassifier(n_estimators=20, num_leaves=7, verbose=-1)
+    model.fit(old_scaler.transform(X_old), y)
+
+    rescaled = rescale_booster(model.booster_, old_scaler, new_scaler)
+
+    X_eval = rng.normal(size=(300, 4)) * [1, 10, 100, 0.1] + [0, 50, -20, 3]
+    expected = model.booster_.predict(old_scaler.transform(X_eval))
+    actual = rescaled.predict(new_scaler.transform(X_eval))
+    assert rescaled.num_trees() == model.booster_.num_trees()
+    np.testing.assert_allclose(actual, expected, atol=1e-12)